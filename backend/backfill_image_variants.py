@@ -0,0 +1,98 @@
+"""
+Builds the resized variants (see image_variants.py) of images uploaded before
+they existed, or of every upload after VARIANTS or FORMATS changed.
+
+    python backfill_image_variants.py          # uploads without a variant set
+    python backfill_image_variants.py --force  # rebuild every set
+
+Resizing is CPU-bound, so images are spread over a process pool. Recipes
+showing a rebuilt image get a new version, one commit per batch, so cached
+pages pick up the variant URLs. The run can be interrupted at any time:
+missing sets are picked up again. Recipes whose image_url points elsewhere,
+as imported ones do, are left alone; their images are not downloaded.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database import SessionLocal
+import catalog
+import image_variants
+import models
+import versioning
+
+
+def uploaded_images():
+    return sorted(
+        filename for filename in os.listdir(image_variants.UPLOAD_DIRECTORY)
+        if not filename.startswith(".") and filename.lower().endswith(image_variants.ORIGINAL_EXTENSIONS)
+        and os.path.isfile(os.path.join(image_variants.UPLOAD_DIRECTORY, filename))
+    )
+
+
+def bump_image_recipes(db, filenames):
+    """Bumps the recipes showing these images; returns how many there were."""
+    image_urls = [image_variants.IMAGE_URL_PREFIX + filename for filename in filenames]
+    recipe_ids = [
+        recipe_id for (recipe_id,) in
+        db.query(models.Recipe.recipe_id).filter(models.Recipe.image_url.in_(image_urls))
+    ]
+    if recipe_ids:
+        versioning.bump_recipes(db, recipe_ids, catalog=True)
+    db.commit()
+    catalog.recipe_details_changed(recipe_ids)
+    return len(recipe_ids)
+
+
+def backfill(force=False, workers=None, batch_size=100):
+    filenames = uploaded_images()
+    if not force:
+        filenames = [
+            filename for filename in filenames
+            if not os.path.isdir(os.path.join(image_variants.VARIANTS_DIRECTORY, image_variants.stem(filename)))
+        ]
+    total = len(filenames)
+    print(f"{total} uploaded images to process.")
+    if not total:
+        return
+
+    print(f"Using {workers or os.cpu_count()} worker processes.")
+    db = SessionLocal()
+    try:
+        processed = built = failed = bumped = 0
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for i in range(0, total, batch_size):
+                batch = filenames[i:i + batch_size]
+                futures = [pool.submit(image_variants.generate, filename, force) for filename in batch]
+                rebuilt = []
+                for filename, future in zip(batch, futures):
+                    try:
+                        if future.result():
+                            rebuilt.append(filename)
+                    except Exception as e:
+                        failed += 1
+                        print(f"Could not build variants of {filename}: {e!r}")
+                bumped += bump_image_recipes(db, rebuilt)
+
+                processed += len(batch)
+                built += len(rebuilt)
+                elapsed = time.perf_counter() - started
+                rate = processed / elapsed if elapsed else 0.0
+                eta = (total - processed) / rate if rate else 0.0
+                print(f"{processed}/{total} images ({built} built, {failed} failed), {rate:.1f} images/s, ETA {eta:.0f}s")
+    finally:
+        db.close()
+
+    print(f"Image variant backfill complete; {bumped} recipes bumped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build resized variants of uploaded recipe images.")
+    parser.add_argument("--force", action="store_true", help="Rebuild every variant set, not only missing ones.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=100, help="Images per batch and commit.")
+    args = parser.parse_args()
+
+    backfill(force=args.force, workers=args.workers, batch_size=args.batch_size)
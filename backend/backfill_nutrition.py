@@ -0,0 +1,167 @@
+"""
+Fills Recipe.calories/protein/fat/carbs offline so the first visitors of a
+recipe do not pay for fuzzy matching.
+
+    python backfill_nutrition.py                  # recipes with missing nutrition
+    python backfill_nutrition.py --recompute-all  # every recipe, e.g. after a new nutrition_final.csv
+
+Fuzzy matching ingredient names is the CPU-bound part, so unmatched
+ingredients are sharded across a process pool first. Recipe totals are then a
+join-and-sum over the food mapping, written back with bulk UPDATEs, one commit
+per batch. The run can be interrupted at any time: unmatched ingredients and
+missing nutrition are picked up again, and --recompute-all resumes from a
+checkpoint file.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import or_, update
+
+from database import SessionLocal
+import migrations
+import models
+import nutrition_calculator
+import versioning
+
+CHECKPOINT_FILE = Path(__file__).parent / "Data" / ".nutrition_backfill_checkpoint"
+
+
+def resolve_names(names):
+    """Worker entry point: fuzzy-matches ingredient names against the nutrition table."""
+    results = []
+    for name in names:
+        matched_name, score, _ = nutrition_calculator.MATCHER.resolve(nutrition_calculator.normalize_ingredient_name(name))
+        results.append((matched_name, score))
+    return results
+
+
+def read_checkpoint(nutrition_hash):
+    """Returns the last recipe_id written by an interrupted --recompute-all run on the same table."""
+    if not CHECKPOINT_FILE.is_file():
+        return 0
+    saved_hash, _, last_id = CHECKPOINT_FILE.read_text().partition(" ")
+    if saved_hash != nutrition_hash:
+        return 0
+    return int(last_id)
+
+
+def write_checkpoint(nutrition_hash, last_id):
+    tmp_file = CHECKPOINT_FILE.with_suffix(".tmp")
+    tmp_file.write_text(f"{nutrition_hash} {last_id}")
+    os.replace(tmp_file, CHECKPOINT_FILE)
+
+
+def pending_recipes_query(db, recompute_all):
+    query = db.query(models.Recipe.recipe_id)
+    if not recompute_all:
+        query = query.filter(or_(
+            models.Recipe.calories.is_(None),
+            models.Recipe.protein.is_(None),
+            models.Recipe.fat.is_(None),
+            models.Recipe.carbs.is_(None),
+        ))
+    return query
+
+
+def match_ingredients(db, pool, shard_size):
+    """Matches every ingredient that has no food match yet, in parallel."""
+    pending = db.query(models.Ingredient.ingredient_id, models.Ingredient.name)\
+        .filter(models.Ingredient.match_score.is_(None))\
+        .order_by(models.Ingredient.ingredient_id).all()
+    if not pending:
+        return
+    print(f"Matching {len(pending)} ingredients against the nutrition table...")
+
+    started = time.perf_counter()
+    shards = [pending[i:i + shard_size] for i in range(0, len(pending), shard_size)]
+    results = pool.map(resolve_names, [[name for _, name in shard] for shard in shards])
+    matched = 0
+    for shard, shard_results in zip(shards, results):
+        db.execute(update(models.Ingredient), [
+            {"ingredient_id": ingredient_id, **nutrition_calculator.food_columns(matched_name, score, db)}
+            for (ingredient_id, _), (matched_name, score) in zip(shard, shard_results)
+        ])
+        db.commit()
+        matched += len(shard)
+    elapsed = time.perf_counter() - started
+    print(f"Matched {matched} ingredients in {elapsed:.1f}s ({matched / elapsed:.1f} ingredients/s).")
+
+
+def backfill(recompute_all=False, workers=None, batch_size=500, shard_size=50, restart=False):
+    nutrition_hash = nutrition_calculator.MATCHER.content_hash
+    last_id = 0
+    if recompute_all and not restart:
+        last_id = read_checkpoint(nutrition_hash)
+        if last_id:
+            print(f"Resuming --recompute-all after recipe_id {last_id}.")
+
+    db = SessionLocal()
+    try:
+        nutrition_calculator.sync_food_nutrition(db)
+        db.commit()
+        print(f"Using {workers or os.cpu_count()} worker processes.")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            match_ingredients(db, pool, shard_size)
+        migrations.backfill_recipe_ingredient_quantities(db)
+        db.commit()
+
+        total = pending_recipes_query(db, recompute_all).filter(models.Recipe.recipe_id > last_id).count()
+        print(f"{total} recipes to process.")
+
+        processed = 0
+        updated = 0
+        started = time.perf_counter()
+        while True:
+            recipe_ids = [
+                recipe_id for (recipe_id,) in pending_recipes_query(db, recompute_all)
+                .filter(models.Recipe.recipe_id > last_id)
+                .order_by(models.Recipe.recipe_id)
+                .limit(batch_size)
+            ]
+            if not recipe_ids:
+                break
+
+            nutrition = nutrition_calculator.calculate_nutrition_batch(recipe_ids, db, scale_all=True)
+            params = [{"recipe_id": recipe_id, **totals} for recipe_id, totals in nutrition.items()]
+            if params:
+                db.execute(update(models.Recipe), params)
+                versioning.bump_recipes(db, nutrition.keys(), catalog=True)
+            db.commit()
+
+            last_id = recipe_ids[-1]
+            if recompute_all:
+                write_checkpoint(nutrition_hash, last_id)
+
+            processed += len(recipe_ids)
+            updated += len(params)
+            elapsed = time.perf_counter() - started
+            rate = processed / elapsed if elapsed else 0.0
+            eta = (total - processed) / rate if rate else 0.0
+            print(f"{processed}/{total} recipes ({updated} updated), {rate:.1f} recipes/s, ETA {eta:.0f}s")
+    finally:
+        db.close()
+
+    if recompute_all and CHECKPOINT_FILE.is_file():
+        CHECKPOINT_FILE.unlink()
+    print("Nutrition backfill complete.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute recipe nutrition.")
+    parser.add_argument("--recompute-all", action="store_true", help="Recompute every recipe, not only those with missing nutrition.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the --recompute-all checkpoint and start over.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=500, help="Recipes per UPDATE batch and commit.")
+    parser.add_argument("--shard-size", type=int, default=50, help="Ingredient names per worker task.")
+    args = parser.parse_args()
+
+    backfill(
+        recompute_all=args.recompute_all,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        shard_size=args.shard_size,
+        restart=args.restart,
+    )
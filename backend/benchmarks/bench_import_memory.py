@@ -0,0 +1,126 @@
+"""
+Peak memory of reading an import file whole (json.load) versus streaming it
+(json_stream) into chunks the way recipe_import consumes them.
+
+Run from the backend directory:
+    python -m benchmarks.bench_import_memory                # every Data/*.json
+    python -m benchmarks.bench_import_memory --scale 100    # plus a synthetic file 100x sotaynauan.json
+
+Every measurement runs in a fresh interpreter, and peak RSS is read from
+there, so one run cannot inflate the next. Nothing touches the
+database.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+import json_stream
+
+BACKEND_DIR = Path(__file__).parent.parent
+DATA_DIR = BACKEND_DIR / "Data"
+SCALE_SOURCE = DATA_DIR / "sotaynauan.json"
+
+
+def peak_rss_mb():
+    # VmHWM belongs to this address space; ru_maxrss would carry over the
+    # parent's peak through fork and exec.
+    status = Path("/proc/self/status")
+    if status.is_file():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def consume(mode, path, chunk_size):
+    """Reads `path` like an import would and returns the number of records."""
+    if mode == "baseline":
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        if mode == "load":
+            data = json.load(f)
+            records = iter(data.items() if isinstance(data, dict) else data)
+        else:
+            # Meal plan files are one top-level object.
+            is_object = f.read(64).lstrip().startswith("{")
+            f.seek(0)
+            records = json_stream.iter_object_items(f) if is_object else json_stream.iter_records(f, path.name)
+        count = 0
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return count
+            count += len(chunk)
+
+
+def measure(mode, path, chunk_size):
+    """Runs consume() in a child interpreter and returns (records, seconds, peak RSS in MB)."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_import_memory", "--measure", mode, str(path), "--chunk-size", str(chunk_size)],
+        check=True, capture_output=True, text=True, cwd=BACKEND_DIR,
+    ).stdout
+    records, seconds, rss = output.split()
+    return int(records), float(seconds), float(rss)
+
+
+def write_scaled_file(scale, path):
+    """An array of SCALE_SOURCE's recipes repeated `scale` times, written one record at a time."""
+    with open(SCALE_SOURCE, "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("[\n")
+        first = True
+        for _ in range(scale):
+            for recipe in recipes:
+                if not first:
+                    out.write(",\n")
+                out.write(json.dumps(recipe, ensure_ascii=False))
+                first = False
+        out.write("\n]\n")
+
+
+def main(scale, chunk_size):
+    files = sorted(DATA_DIR.glob("*.json"))
+    scaled = None
+    if scale:
+        scaled = Path(tempfile.gettempdir()) / f"recipes_x{scale}.json"
+        print(f"Writing {scaled}...")
+        write_scaled_file(scale, scaled)
+        files.append(scaled)
+
+    print(f"Interpreter baseline: {measure('baseline', SCALE_SOURCE, chunk_size)[2]:.1f} MB")
+    print(f"{'file':<28} {'size MB':>8} {'records':>8} {'load MB':>8} {'stream MB':>10} {'load s':>7} {'stream s':>9}")
+    try:
+        for path in files:
+            records, load_seconds, load_rss = measure("load", path, chunk_size)
+            _, stream_seconds, stream_rss = measure("stream", path, chunk_size)
+            size = os.path.getsize(path) / (1 << 20)
+            print(f"{path.name:<28} {size:>8.1f} {records:>8} {load_rss:>8.1f} {stream_rss:>10.1f} {load_seconds:>7.2f} {stream_seconds:>9.2f}")
+    finally:
+        if scaled is not None:
+            scaled.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare peak RSS of json.load and streamed import parsing.")
+    parser.add_argument("--scale", type=int, default=0, help="Also measure a synthetic file this many times sotaynauan.json.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Records held at once (default: recipe_import.CHUNK_SIZE).")
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        mode, path = args.measure
+        started = time.perf_counter()
+        records = consume(mode, Path(path), args.chunk_size)
+        print(records, time.perf_counter() - started, peak_rss_mb())
+    else:
+        # Imported here so the measuring children do not load the whole app.
+        from recipe_import import CHUNK_SIZE
+        main(args.scale, args.chunk_size or CHUNK_SIZE)
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for moderation.BadWordFilter.
+
+Compares checking a recipe payload with the original implementation (every
+term tested against every field with `in`) and with the compiled automaton,
+for word lists of growing size, and checks that both flag the same fields
+when diacritic folding and word boundaries are off. The sample text is
+composed (NFC) first: some recipes store decomposed letters, which the
+original check could not match and the filter normalizes.
+
+Run from the backend directory:
+    python -m benchmarks.bench_moderation
+"""
+import json
+import random
+import time
+import unicodedata
+from pathlib import Path
+
+import moderation
+
+DATA_DIR = Path(__file__).parent.parent / "Data"
+SAMPLE_FILE = DATA_DIR / "monngonmoingay.json"
+LIST_SIZES = [10, 1000, 50000]
+SAMPLE_SIZE = 200
+
+
+def legacy_flagged_field(bad_words, fields):
+    for label, text in fields:
+        if text and any(bad_word in text.lower() for bad_word in bad_words):
+            return label
+    return None
+
+
+def recipe_fields(recipe):
+    """(label, NFC text) pairs of a recipe, in the order validate_recipe checks them."""
+    fields = [("title", recipe.get("title")), ("description", recipe.get("description"))]
+    fields += [("step", step) for step in (recipe.get("step-detail") or "").split("\n")]
+    fields += [("tag", tag) for tag in recipe.get("tags") or []]
+    fields += [("ingredient", line[0]) for line in recipe.get("ingredients") or [] if line]
+    return [(label, unicodedata.normalize("NFC", text) if text else text) for label, text in fields]
+
+
+def random_terms(count, rng):
+    """Made-up terms of 5-10 letters that real recipes are unlikely to contain, plus one that they do."""
+    letters = "bcdfghjklmnpqrstvwxz"
+    terms = {"".join(rng.choice(letters) for _ in range(rng.randint(5, 10))) for _ in range(count - 1)}
+    return sorted(terms) + ["hành"]
+
+
+def timed(func, payloads):
+    started = time.perf_counter()
+    results = [func(fields) for fields in payloads]
+    return results, (time.perf_counter() - started) / len(payloads) * 1000
+
+
+def main():
+    rng = random.Random(0)
+    with open(SAMPLE_FILE, "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+    payloads = [recipe_fields(recipe) for recipe in rng.sample(recipes, min(SAMPLE_SIZE, len(recipes)))]
+
+    print(f"{len(payloads)} recipe payloads")
+    print(f"{'terms':>7} {'build ms':>9} {'legacy ms/recipe':>17} {'automaton ms/recipe':>20} {'folded ms/recipe':>17}")
+    for size in LIST_SIZES:
+        terms = random_terms(size, rng)
+        started = time.perf_counter()
+        exact = moderation.BadWordFilter(terms, fold_diacritics=False, whole_words=False)
+        build_ms = (time.perf_counter() - started) * 1000
+        folded = moderation.BadWordFilter(terms)
+
+        legacy_words = {term.lower() for term in terms}
+        legacy_results, legacy_ms = timed(lambda fields: legacy_flagged_field(legacy_words, fields), payloads)
+        exact_results, exact_ms = timed(exact.flagged_field, payloads)
+        _, folded_ms = timed(folded.flagged_field, payloads)
+
+        mismatches = sum(a != b for a, b in zip(legacy_results, exact_results))
+        print(f"{size:>7} {build_ms:>9.1f} {legacy_ms:>17.3f} {exact_ms:>20.3f} {folded_ms:>17.3f}"
+              + (f"  MISMATCHES: {mismatches}" if mismatches else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for nutrition_calculator.match_ingredient.
+
+Compares the per-call latency of the original implementation (re-read the CSV
+and loop over every alias) with the preloaded NutritionMatcher, and checks that
+both pick the same food for every sampled ingredient name.
+
+Run from the backend directory:
+    python -m benchmarks.bench_nutrition_matcher
+"""
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+from rapidfuzz import fuzz
+
+import nutrition_calculator
+
+DATA_DIR = Path(__file__).parent.parent / "Data"
+SAMPLE_FILE = DATA_DIR / "monngonmoingay.json"
+
+
+def legacy_match_ingredient(raw_name):
+    df = pd.read_csv(nutrition_calculator.CSV_PATH, encoding='utf-8')
+    nutrient_dict = {
+        row['Name'].lower(): [float(row['Energy']), float(row['Protein']), float(row['Fat']), float(row['Carbohydrate'])]
+        for _, row in df.iterrows()
+    }
+
+    raw_name_lower = raw_name.lower()
+    best_match = None
+    max_score = 0
+    best_mean_score = 0
+
+    for std_ing in nutrient_dict.keys():
+        std_parts = [part.strip() for part in std_ing.split(" - ")]
+        for part in std_parts:
+            scores = [
+                fuzz.ratio(raw_name_lower, part),
+                fuzz.partial_ratio(raw_name_lower, part),
+                fuzz.token_sort_ratio(raw_name_lower, part),
+                fuzz.token_set_ratio(raw_name_lower, part)
+            ]
+            current_score = max(scores)
+            mean_score = sum(scores) / len(scores)
+
+            if current_score > max_score:
+                max_score = current_score
+                best_match = std_ing
+                best_mean_score = mean_score
+            elif current_score == max_score and mean_score > best_mean_score:
+                best_match = std_ing
+                best_mean_score = mean_score
+
+    if max_score > 80 and best_match:
+        return best_match, nutrient_dict[best_match]
+    else:
+        return None, [0, 0, 0, 0]
+
+
+def load_sample_names(limit):
+    with open(SAMPLE_FILE, "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+    names = []
+    seen = set()
+    for recipe in recipes:
+        for ingredient in recipe["ingredients"]:
+            if ingredient and ingredient[0] not in seen:
+                seen.add(ingredient[0])
+                names.append(ingredient[0])
+    return names[:limit]
+
+
+def time_per_call(func, names):
+    start = time.perf_counter()
+    results = [func(name) for name in names]
+    return (time.perf_counter() - start) / len(names), results
+
+
+def main(limit=200):
+    names = load_sample_names(limit)
+
+    legacy_latency, legacy_results = time_per_call(legacy_match_ingredient, names)
+    new_latency, new_results = time_per_call(nutrition_calculator.match_ingredient, names)
+
+    mismatches = [
+        (name, old[0], new[0])
+        for name, old, new in zip(names, legacy_results, new_results)
+        if old[0] != new[0] or list(old[1]) != list(new[1])
+    ]
+
+    print(f"ingredients sampled: {len(names)}")
+    print(f"legacy  match_ingredient: {legacy_latency * 1000:8.3f} ms/call")
+    print(f"matcher match_ingredient: {new_latency * 1000:8.3f} ms/call")
+    print(f"speedup: {legacy_latency / new_latency:.1f}x")
+    print(f"mismatched results: {len(mismatches)}")
+    for name, old, new in mismatches[:10]:
+        print(f"  {name!r}: legacy={old!r} matcher={new!r}")
+
+
+if __name__ == "__main__":
+    main()
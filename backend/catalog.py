@@ -0,0 +1,45 @@
+"""
+Hooks that keep in-process state derived from the recipe catalog (the
+tag/ingredient filter index, the featured recipe pool, cached listing counts,
+cached recipe page bundles) in step with the database. Routes that write recipes, or anything a
+recipe page shows, call one of these after their commit. The version
+counters behind the ETags live in the database and are bumped before the
+commit instead; see versioning.
+"""
+from sqlalchemy.orm import Session
+
+import recipe_bundle
+import recipe_counts
+from featured_recipes import FEATURED_POOL
+from recipe_filter_index import RECIPE_FILTER_INDEX
+
+
+def recipes_changed(db: Session, recipe_ids):
+    """After recipes were created or edited."""
+    RECIPE_FILTER_INDEX.refresh_recipes(db, recipe_ids)
+    FEATURED_POOL.refresh_recipes(db, recipe_ids)
+    recipe_counts.invalidate()
+    recipe_bundle.invalidate(recipe_ids)
+
+
+def recipes_removed(recipe_ids):
+    RECIPE_FILTER_INDEX.remove_recipes(recipe_ids)
+    FEATURED_POOL.remove_recipes(recipe_ids)
+    recipe_counts.invalidate()
+    recipe_bundle.invalidate(recipe_ids)
+
+
+def catalog_reset():
+    """After bulk changes such as an import that wiped existing recipes."""
+    RECIPE_FILTER_INDEX.invalidate()
+    FEATURED_POOL.invalidate()
+    recipe_counts.invalidate()
+    recipe_bundle.invalidate()
+
+
+def recipe_details_changed(recipe_ids=None):
+    """
+    After writes that change what a recipe page shows but not listings or
+    filters: reviews, nutrition overrides, deleted users. None means any recipe.
+    """
+    recipe_bundle.invalidate(recipe_ids)
@@ -1,12 +1,14 @@
 from database import engine, Base, SessionLocal
 import models
 import auth
+from migrations import run_migrations
 
 def setup_database():
     print("Connecting to the database...")
     print("Creating tables...")
     Base.metadata.create_all(bind=engine)
     print("Tables created successfully!")
+    run_migrations()
     db = SessionLocal()
     try:
         print("Checking for default admin user...")
@@ -0,0 +1,69 @@
+"""
+Uniform random picks for the homepage's featured carousel.
+
+ORDER BY random() reads and sorts every recipe with an image on each request.
+Instead, the ids of eligible recipes (those with an image) are kept in memory
+as a sorted array, and sample() draws `count` distinct positions from it with
+random.sample, which is O(count) whatever the catalog size. The database then
+only has to look up those few rows by primary key. Every eligible recipe is
+equally likely, and every set of picks is too.
+
+The pool is built lazily and kept current through the catalog hooks, like the
+recipe filter index.
+"""
+import random
+from threading import Lock
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+
+ID_DTYPE = np.int64
+EMPTY_IDS = np.empty(0, dtype=ID_DTYPE)
+
+
+class FeaturedPool:
+    def __init__(self):
+        self._lock = Lock()
+        self._built = False
+        self._ids = EMPTY_IDS
+
+    @staticmethod
+    def _eligible_ids(db: Session, recipe_ids=None):
+        query = db.query(models.Recipe.recipe_id).filter(models.Recipe.image_url != None)
+        if recipe_ids is not None:
+            query = query.filter(models.Recipe.recipe_id.in_(recipe_ids))
+        return np.unique(np.asarray([recipe_id for (recipe_id,) in query], dtype=ID_DTYPE))
+
+    def refresh_recipes(self, db: Session, recipe_ids):
+        """Re-checks recipes that were created or edited, e.g. given or stripped of an image."""
+        recipe_ids = np.unique(np.asarray(list(recipe_ids), dtype=ID_DTYPE))
+        with self._lock:
+            if not self._built or not len(recipe_ids):
+                return
+            eligible = self._eligible_ids(db, recipe_ids.tolist())
+            self._ids = np.union1d(np.setdiff1d(self._ids, recipe_ids, assume_unique=True), eligible)
+
+    def remove_recipes(self, recipe_ids):
+        recipe_ids = np.unique(np.asarray(list(recipe_ids), dtype=ID_DTYPE))
+        with self._lock:
+            if self._built and len(recipe_ids):
+                self._ids = np.setdiff1d(self._ids, recipe_ids, assume_unique=True)
+
+    def invalidate(self):
+        with self._lock:
+            self._built = False
+            self._ids = EMPTY_IDS
+
+    def sample(self, db: Session, count: int) -> list:
+        """Up to `count` distinct eligible recipe ids, in random order."""
+        with self._lock:
+            if not self._built:
+                self._ids = self._eligible_ids(db)
+                self._built = True
+            positions = random.sample(range(len(self._ids)), min(count, len(self._ids)))
+            return self._ids[positions].tolist()
+
+
+FEATURED_POOL = FeaturedPool()
@@ -0,0 +1,212 @@
+"""
+Streaming upload of recipe images.
+
+save_image() parses the multipart body as it arrives instead of letting the
+framework buffer it whole, so an upload holds about one network chunk in
+memory however large the file is:
+
+    - a Content-Length over the limit is refused before anything is read, and
+      the file part is cut off with 413 as soon as it passes MAX_IMAGE_BYTES;
+    - the first bytes decide the image type (JPEG, PNG, GIF or WebP) and the
+      extension, whatever the client called the file or claimed it to be;
+    - chunks are written from the thread pool, never on the event loop, to a
+      hidden temp file in the upload directory that is renamed into place
+      only once the upload is complete, so a half-written image is never
+      served.
+"""
+import os
+import tempfile
+import time
+import uuid
+
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_DIRECTORY = "/app/uploads"
+IMAGE_URL_PREFIX = "http://localhost:8080/images/"
+FIELD_NAME = "image"
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Room for the multipart boundaries and part headers around the file.
+MAX_FORM_OVERHEAD_BYTES = 64 * 1024
+SNIFF_BYTES = 12
+
+# Magic numbers at the start of the file, and the extension they get.
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+
+
+def sniff_extension(head: bytes):
+    """The extension for an image starting with `head`, or None if it is not a supported image."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def too_large():
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB.",
+    )
+
+
+class ImageUpload:
+    """
+    Collects the image part of a multipart body from the parser callbacks and
+    writes it out between chunks.
+    """
+
+    def __init__(self):
+        self.headers = {}
+        self.header_field = b""
+        self.header_value = b""
+        self.in_image = False
+        self.found = False
+        self.pending = []
+        self.size = 0
+        self.extension = None
+        self.file = None
+        self.temp_path = None
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_field(self, data, start, end):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition"))
+        # Browsers send an empty filename when no file was chosen.
+        self.in_image = (
+            not self.found
+            and options.get(b"name") == FIELD_NAME.encode()
+            and bool(options.get(b"filename"))
+        )
+        self.found = self.found or self.in_image
+
+    def on_part_data(self, data, start, end):
+        if self.in_image:
+            self.pending.append(data[start:end])
+            self.size += end - start
+
+    def on_part_end(self):
+        self.in_image = False
+
+    async def write_pending(self):
+        """Checks and writes what the last chunk added to the image."""
+        if not self.pending:
+            return
+        if self.size > MAX_IMAGE_BYTES:
+            raise too_large()
+        if self.extension is None:
+            # Nothing is written before the type is known.
+            if self.size < SNIFF_BYTES:
+                return
+            await self.open_file()
+        pending, self.pending = self.pending, []
+        await run_in_threadpool(self.file.writelines, pending)
+
+    async def open_file(self):
+        """Sniffs the image type from the first bytes and opens the temp file."""
+        self.extension = sniff_extension(b"".join(self.pending)[:SNIFF_BYTES])
+        if self.extension is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Only JPEG, PNG, GIF and WebP images can be uploaded.",
+            )
+        fd, self.temp_path = await run_in_threadpool(
+            tempfile.mkstemp, dir=UPLOAD_DIRECTORY, prefix=".upload-", suffix=".part"
+        )
+        self.file = os.fdopen(fd, "wb")
+
+    async def finish(self) -> str:
+        """Moves the complete file into place and returns its name."""
+        if not self.found or self.size == 0:
+            raise HTTPException(status_code=422, detail="No image file in the upload.")
+        if self.extension is None:
+            await self.open_file()
+        await self.write_pending()
+        filename = f"{uuid.uuid4()}.{self.extension}"
+        await run_in_threadpool(self._commit, os.path.join(UPLOAD_DIRECTORY, filename))
+        return filename
+
+    def _commit(self, path):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.chmod(self.temp_path, 0o644)
+        os.replace(self.temp_path, path)
+        self.temp_path = None
+
+    def discard(self):
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        if self.temp_path is not None:
+            try:
+                os.unlink(self.temp_path)
+            except FileNotFoundError:
+                pass
+
+
+async def save_image(request: Request) -> dict:
+    """Stores the `image` file of a multipart request; returns its URL, size and upload throughput."""
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=422, detail="Expected a multipart/form-data upload.")
+    max_body = MAX_IMAGE_BYTES + MAX_FORM_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_body:
+        raise too_large()
+
+    upload = ImageUpload()
+    parser = MultipartParser(options[b"boundary"], upload.callbacks())
+    started = time.perf_counter()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise too_large()
+            parser.write(chunk)
+            await upload.write_pending()
+        parser.finalize()
+        filename = await upload.finish()
+    except MultipartParseError:
+        raise HTTPException(status_code=400, detail="Malformed multipart upload.")
+    finally:
+        await run_in_threadpool(upload.discard)
+    seconds = time.perf_counter() - started
+    return {
+        "image_url": IMAGE_URL_PREFIX + filename,
+        "size_bytes": upload.size,
+        "seconds": round(seconds, 3),
+        "bytes_per_second": round(upload.size / seconds) if seconds > 0 else None,
+    }
@@ -0,0 +1,181 @@
+"""
+Resized variants of uploaded recipe images, so pages load an image the size
+they show instead of whatever the phone produced.
+
+Every original in the upload directory gets, per entry of VARIANTS, a WebP
+and a JPEG no wider than the variant's width (never upscaled):
+
+    /app/uploads/<uuid>.jpg                                 the original
+    /app/uploads/variants/<uuid>/manifest.json              names and sizes
+    /app/uploads/variants/<uuid>/card-480.webp, ...
+
+nginx serves them under /images/variants/ like the originals. A set is built
+in a hidden temp directory that is renamed into place, and file names carry the
+configured width, so a URL never changes content and can be cached as
+immutable.
+
+Uploads are queued with submit() on a process pool, off the request path;
+backfill_image_variants.py builds the sets missing for earlier uploads.
+variant_urls() gives the URLs for a recipe's image_url once its set exists,
+and None for images hosted elsewhere, such as those of imported recipes.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from PIL import Image, ImageOps
+
+from cache import LRUCache
+from image_upload import IMAGE_URL_PREFIX, UPLOAD_DIRECTORY
+
+VARIANTS_DIRECTORY = os.path.join(UPLOAD_DIRECTORY, "variants")
+MANIFEST_NAME = "manifest.json"
+# (name, maximum width in pixels)
+VARIANTS = [("thumb", 160), ("card", 480), ("hero", 1200)]
+# (extension, Pillow format, save options)
+FORMATS = [
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+]
+ORIGINAL_EXTENSIONS = (".jpg", ".png", ".gif", ".webp")
+POOL_WORKERS = 2
+
+MANIFEST_CACHE = LRUCache(maxsize=4096)
+
+_pool = None
+_pool_lock = Lock()
+
+
+def original_filename(image_url):
+    """The file name in the upload directory behind an image URL, or None if it was not uploaded here."""
+    if not image_url or not image_url.startswith(IMAGE_URL_PREFIX):
+        return None
+    filename = image_url[len(IMAGE_URL_PREFIX):]
+    if "/" in filename or filename.startswith(".") or not filename.lower().endswith(ORIGINAL_EXTENSIONS):
+        return None
+    return filename
+
+
+def stem(filename):
+    return os.path.splitext(filename)[0]
+
+
+def flatten(image: Image.Image) -> Image.Image:
+    """The image on a white background, for formats without transparency."""
+    if image.mode == "RGB":
+        return image
+    rgba = image.convert("RGBA")
+    background = Image.new("RGB", rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+
+def generate(filename, force=False) -> bool:
+    """
+    Worker entry point: builds the variant set of one original. Returns False
+    when the set already existed and force was not given.
+    """
+    target = os.path.join(VARIANTS_DIRECTORY, stem(filename))
+    if os.path.isdir(target) and not force:
+        return False
+    os.makedirs(VARIANTS_DIRECTORY, exist_ok=True)
+    temp = tempfile.mkdtemp(dir=VARIANTS_DIRECTORY, prefix=f".{stem(filename)}-")
+    try:
+        largest = max(width for _, width in VARIANTS)
+        with Image.open(os.path.join(UPLOAD_DIRECTORY, filename)) as original:
+            # Lets JPEG decode at a reduced scale when the original is much larger.
+            original.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(original)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P", "PA") else "RGB")
+
+        manifest = {}
+        for name, max_width in VARIANTS:
+            width = min(max_width, image.width)
+            height = max(round(image.height * width / image.width), 1)
+            resized = image.resize((width, height), Image.LANCZOS) if width < image.width else image
+            entry = {"width": width, "height": height}
+            for extension, image_format, options in FORMATS:
+                variant_name = f"{name}-{max_width}.{extension}"
+                (resized if image_format == "WEBP" else flatten(resized)).save(
+                    os.path.join(temp, variant_name), image_format, **options
+                )
+                entry[extension] = variant_name
+            manifest[name] = entry
+        with open(os.path.join(temp, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        # mkdtemp is private to this user; nginx reads the volume as another one.
+        os.chmod(temp, 0o755)
+        for name in os.listdir(temp):
+            os.chmod(os.path.join(temp, name), 0o644)
+        if os.path.isdir(target):
+            stale = tempfile.mkdtemp(dir=VARIANTS_DIRECTORY, prefix=f".{stem(filename)}-stale-")
+            os.replace(target, os.path.join(stale, "set"))
+            os.rename(temp, target)
+            shutil.rmtree(stale, ignore_errors=True)
+        else:
+            try:
+                os.rename(temp, target)
+            except OSError:
+                # Another worker finished the same set first.
+                if not os.path.isdir(target):
+                    raise
+                return False
+        return True
+    finally:
+        shutil.rmtree(temp, ignore_errors=True)
+
+
+def pool() -> ProcessPoolExecutor:
+    """The process pool for uploads, started on first use. Workers are spawned, not forked from the server."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def submit(filename):
+    """Queues the variant set of a new upload; returns the Future of generate()."""
+    return pool().submit(generate, filename)
+
+
+def read_manifest(filename):
+    key = stem(filename)
+    manifest = MANIFEST_CACHE.get(key)
+    if manifest is None:
+        try:
+            with open(os.path.join(VARIANTS_DIRECTORY, key, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            # Not generated yet; checked again next time.
+            return None
+        MANIFEST_CACHE.put(key, manifest)
+    return manifest
+
+
+def attach(recipes):
+    """Sets image_variants on loaded recipes for the response schemas, which only serialize it."""
+    for recipe in recipes:
+        recipe.image_variants = variant_urls(recipe.image_url)
+    return recipes
+
+
+def variant_urls(image_url):
+    """
+    {"thumb": {"width", "height", "webp", "jpeg"}, "card": ..., "hero": ...}
+    for an uploaded image whose variants exist, else None.
+    """
+    filename = original_filename(image_url)
+    manifest = read_manifest(filename) if filename else None
+    if manifest is None:
+        return None
+    base = f"{IMAGE_URL_PREFIX}variants/{stem(filename)}/"
+    return {
+        name: {"width": entry["width"], "height": entry["height"], "webp": base + entry["webp"], "jpeg": base + entry["jpg"]}
+        for name, entry in manifest.items()
+    }
@@ -0,0 +1,194 @@
+"""
+Recipe and meal plan imports as background jobs.
+
+submit() records a job in import_jobs and hands it to a single background
+thread, so the request returns at once and imports run one after another in
+the order they were submitted. A job streams its file through the chunked
+importer in a single pass. After every chunk, in the same transaction as the
+chunk, the job's processed count, bytes read and errors are updated and a
+cancel request is checked. Cancelling therefore rolls back the chunk in
+flight and leaves every earlier chunk committed. The record total is only
+known at the end of the file, so the ETA of a running job is estimated from
+the bytes read.
+
+Because the processed count only ever moves together with committed data,
+jobs that were queued or running when the server stopped are resumed on
+startup (resume_jobs) from exactly where they were.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+import json_stream
+import meal_plan_import
+import models
+import recipe_import
+from database import SessionLocal
+
+DATA_DIR = Path(__file__).parent / "Data"
+ACTIVE_STATUSES = ("queued", "running")
+MAX_REPORTED_ERRORS = 100
+
+EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-job")
+
+IMPORTERS = {
+    "recipes": (recipe_import.delete_existing_recipes, recipe_import.import_recipes),
+    "meal_plans": (meal_plan_import.delete_existing_meal_plans, meal_plan_import.import_meal_plans),
+}
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def data_path(filename) -> Path:
+    return DATA_DIR / filename
+
+
+def open_records(kind, path: Path):
+    """The open file and an iterator over its records: recipes, or (meal name, plans) pairs."""
+    f = open(path, "r", encoding="utf-8")
+    if kind == "meal_plans":
+        return f, json_stream.iter_object_items(f)
+    return f, json_stream.iter_records(f, path.name)
+
+
+def submit(db: Session, kind, filename, delete_existing) -> models.ImportJob:
+    job = models.ImportJob(kind=kind, filename=filename, delete_existing=delete_existing, status="queued")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    EXECUTOR.submit(run_job, job.id)
+    return job
+
+
+def resume_jobs():
+    """Re-queues jobs a previous server process did not finish."""
+    db = SessionLocal()
+    try:
+        job_ids = [
+            job_id for (job_id,) in db.query(models.ImportJob.id)
+            .filter(models.ImportJob.status.in_(ACTIVE_STATUSES))
+            .order_by(models.ImportJob.id)
+        ]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        print(f"Resuming import job {job_id}...")
+        EXECUTOR.submit(run_job, job_id)
+
+
+def record_errors(job: models.ImportJob, errors):
+    if not errors:
+        return
+    job.error_count += len(errors)
+    room = MAX_REPORTED_ERRORS - len(job.errors)
+    if room > 0:
+        job.errors = job.errors + errors[:room]
+
+
+def finish(db: Session, job: models.ImportJob, status):
+    job.status = status
+    job.finished_at = job.updated_at = utcnow()
+    db.commit()
+
+
+def run_job(job_id):
+    db = SessionLocal()
+    job = db.get(models.ImportJob, job_id)
+    try:
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return
+        if job.cancel_requested:
+            finish(db, job, "cancelled")
+            return
+
+        path = data_path(job.filename)
+        job.status = "running"
+        job.started_at = job.updated_at = utcnow()
+        job.resumed_from = job.processed
+        # A resumed run reads the file from the start again to skip what is done.
+        job.size_bytes = os.path.getsize(path)
+        job.bytes_read = 0
+        db.commit()
+
+        delete_existing, import_records = IMPORTERS[job.kind]
+        if job.delete_existing and job.processed == 0:
+            delete_existing(db)
+
+        f, records = open_records(job.kind, path)
+
+        def on_chunk(db, records, errors):
+            cancel_requested = db.query(models.ImportJob.cancel_requested)\
+                .filter(models.ImportJob.id == job_id).scalar()
+            if cancel_requested:
+                raise ImportCancelled()
+            job.processed += records
+            # Includes what the reader buffered ahead of the chunk.
+            job.bytes_read = f.buffer.tell()
+            job.updated_at = utcnow()
+            record_errors(job, errors)
+
+        with f:
+            import_records(db, records, start=job.processed, on_chunk=on_chunk)
+        job.total = job.processed
+        job.bytes_read = job.size_bytes
+        finish(db, job, "succeeded")
+    except ImportCancelled:
+        db.rollback()
+        finish(db, job, "cancelled")
+    except Exception as e:
+        db.rollback()
+        record_errors(job, [f"{type(e).__name__}: {e}"])
+        finish(db, job, "failed")
+    finally:
+        db.close()
+
+
+def request_cancel(db: Session, job: models.ImportJob):
+    """A queued job is cancelled at once; a running one stops at its next chunk boundary."""
+    if job.status == "queued":
+        job.cancel_requested = True
+        finish(db, job, "cancelled")
+    elif job.status == "running":
+        job.cancel_requested = True
+        db.commit()
+
+
+def job_status(job: models.ImportJob) -> dict:
+    """The job with its throughput (records per second this run) and ETA."""
+    rate = eta = None
+    if job.started_at is not None:
+        end = job.finished_at or utcnow()
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0:
+            rate = (job.processed - job.resumed_from) / elapsed
+    if job.status == "running" and job.bytes_read and job.size_bytes:
+        elapsed = (utcnow() - job.started_at).total_seconds()
+        eta = elapsed * max(job.size_bytes - job.bytes_read, 0) / job.bytes_read
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "filename": job.filename,
+        "delete_existing": job.delete_existing,
+        "status": job.status,
+        "cancel_requested": job.cancel_requested,
+        "total": job.total,
+        "processed": job.processed,
+        "size_bytes": job.size_bytes,
+        "bytes_read": job.bytes_read,
+        "rows_per_second": round(rate, 1) if rate is not None else None,
+        "eta_seconds": round(eta, 1) if eta is not None else None,
+        "error_count": job.error_count,
+        "errors": job.errors,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
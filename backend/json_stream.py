@@ -0,0 +1,136 @@
+"""
+Incremental readers for the import files, so an import holds one record (and
+whatever chunk the writer is filling) in memory instead of the whole dataset.
+
+    iter_array(f)          items of a top-level JSON array, one at a time
+    iter_object_items(f)   (key, value) pairs of a top-level JSON object
+    iter_ndjson(f)         one JSON value per line (.jsonl / .ndjson files)
+    iter_records(f, name)  iter_ndjson or iter_array, by file name
+
+The JSON readers decode each value with json.JSONDecoder.raw_decode over a
+buffer that is refilled from the file as needed and trimmed behind the
+parser, so they only need the standard library. A value still undecoded after
+MAX_VALUE_CHARS, such as everything after a syntax error, raises ValueError
+instead of pulling the rest of the file into memory.
+"""
+import json
+
+READ_SIZE = 1 << 16
+# Far beyond any single recipe or meal plan in Data/.
+MAX_VALUE_CHARS = 16 << 20
+NDJSON_SUFFIXES = (".jsonl", ".ndjson")
+WHITESPACE = " \t\n\r"
+NUMBER_CHARS = "0123456789.eE+-"
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """A text buffer over a file with a read position; refills on demand."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Reads more text, at least as much as is buffered so a value that keeps growing costs linear time."""
+        if self.eof:
+            return False
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        data = self.f.read(max(READ_SIZE, len(self.buffer)))
+        if not data:
+            self.eof = True
+            return False
+        self.buffer += data
+        return True
+
+    def peek(self):
+        """The next character that is not whitespace, without consuming it; "" at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON: expected one of {chars!r} but found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def fill_value(self):
+        """fill() for a value that does not decode yet, unless it is already too long to be one."""
+        if len(self.buffer) - self.pos > MAX_VALUE_CHARS:
+            raise ValueError(
+                f"Invalid JSON: no complete value within {MAX_VALUE_CHARS // (1 << 20)}M characters"
+            )
+        return self.fill()
+
+    def value(self):
+        """Decodes the next JSON value, reading more of the file until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill_value():
+                    continue
+                raise
+            # A number cut off by the end of the buffer can look complete, as
+            # "12" of "125" or "-2" of "-2.5"; valid JSON never has these
+            # characters right after a value.
+            cut_off = end == len(self.buffer) or self.buffer[end] in NUMBER_CHARS
+            if cut_off and self.fill_value():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_array(f):
+    reader = _Reader(f)
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_object_items(f):
+    reader = _Reader(f)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        if reader.peek() != '"':
+            reader.expect('"')
+        key = reader.value()
+        reader.expect(":")
+        yield key, reader.value()
+        if reader.expect(",}") == "}":
+            return
+
+
+def iter_ndjson(f):
+    while True:
+        line = f.readline(MAX_VALUE_CHARS + 1)
+        if not line:
+            return
+        if len(line) > MAX_VALUE_CHARS:
+            raise ValueError(f"Invalid JSON: line longer than {MAX_VALUE_CHARS // (1 << 20)}M characters")
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_records(f, filename):
+    if str(filename).lower().endswith(NDJSON_SUFFIXES):
+        return iter_ndjson(f)
+    return iter_array(f)
@@ -1,13 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from database import Base, engine
-from routers import authentication, recipes, reviews, ingredients, tags, admin, users, meal_plan, custom_meal_plan, saved_meal_plan
+from migrations import run_migrations
+import import_jobs
+from routers import authentication, recipes, reviews, ingredients, tags, admin, users, meal_plan, custom_meal_plan, saved_meal_plan, import_jobs as import_jobs_router
 
 Base.metadata.create_all(bind=engine)
+run_migrations()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Only a server that is starting picks up unfinished imports, not every
+    # process that imports this module.
+    import_jobs.resume_jobs()
+    yield
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -34,6 +48,7 @@ app.include_router(users.router)
 app.include_router(meal_plan.router)
 app.include_router(custom_meal_plan.router)
 app.include_router(saved_meal_plan.router)
+app.include_router(import_jobs_router.router)
 
 @app.get("/health")
 def health():
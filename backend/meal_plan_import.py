@@ -0,0 +1,80 @@
+"""
+Loader behind /import_meal_plans/. The file maps each meal name to its plans
+by party size ("2_nguoi": [recipe titles]); meals are loaded in chunks of
+CHUNK_SIZE, one transaction per chunk, and run as background jobs like the
+recipe import (see import_jobs).
+"""
+from itertools import islice
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models
+
+CHUNK_SIZE = 20
+
+
+def delete_existing_meal_plans(db: Session):
+    db.query(models.MealPlanRecipe).delete()
+    db.query(models.MealPlan).delete()
+    db.execute(text("ALTER SEQUENCE meal_plans_meal_plan_id_seq RESTART WITH 1;"))
+    db.commit()
+
+
+def import_meal(db: Session, meal_name, meal_details, errors) -> int:
+    """Adds the plans of one meal; returns how many were added."""
+    if not isinstance(meal_details, dict):
+        errors.append(f"Meal {meal_name}: not a JSON object")
+        return 0
+
+    imported_count = 0
+    for num_people_str, recipe_titles in meal_details.items():
+        try:
+            num_people = int(num_people_str.split('_')[0])
+        except (ValueError, IndexError):
+            print(f"Bỏ qua định dạng không hợp lệ: {num_people_str}")
+            errors.append(f"Meal {meal_name}: invalid party size {num_people_str!r}")
+            continue
+
+        new_meal_plan = models.MealPlan(meal_name=meal_name, num_people=num_people)
+        db.add(new_meal_plan)
+        db.flush()
+
+        for title in recipe_titles:
+            title = title.strip()  # Remove leading/trailing whitespace
+            # Use case-insensitive matching for better compatibility
+            recipe = db.query(models.Recipe).filter(
+                models.Recipe.title.ilike(title)
+            ).first()
+            if recipe:
+                meal_plan_recipe = models.MealPlanRecipe(
+                    meal_plan_id=new_meal_plan.meal_plan_id,
+                    recipe_id=recipe.recipe_id
+                )
+                db.add(meal_plan_recipe)
+            else:
+                print(f"Cảnh báo: Không tìm thấy công thức với tiêu đề '{title}'. Bỏ qua liên kết.")
+
+        imported_count += 1
+    return imported_count
+
+
+def import_meal_plans(db: Session, meals, chunk_size=CHUNK_SIZE, start=0, on_chunk=None) -> int:
+    """
+    Loads (meal name, plans) pairs chunk by chunk, skipping the first `start`;
+    returns how many plans were added. on_chunk works as in
+    recipe_import.import_recipes.
+    """
+    meals = islice(meals, start, None)
+    imported_count = 0
+    while True:
+        chunk = list(islice(meals, chunk_size))
+        if not chunk:
+            break
+        errors = []
+        for meal_name, meal_details in chunk:
+            imported_count += import_meal(db, meal_name, meal_details, errors)
+        if on_chunk:
+            on_chunk(db, len(chunk), errors)
+        db.commit()
+    return imported_count
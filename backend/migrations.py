@@ -0,0 +1,161 @@
+"""
+Schema upgrades for databases created before a model change.
+
+Base.metadata.create_all only creates missing tables, so columns and indexes
+added to existing tables are applied here. Each migration runs once in its own
+transaction and is recorded in schema_migrations; the DDL is idempotent so a
+half-applied database can simply be migrated again.
+
+    python migrations.py
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import Base, SessionLocal, engine
+import models
+import nutrition_calculator
+import recipe_search
+
+
+def backfill_recipe_ingredient_quantities(db: Session, batch_size=1000):
+    """Parses every distinct unparsed quantity once and writes amount/unit/grams back."""
+    quantities = [
+        quantity for (quantity,) in db.query(models.RecipeIngredient.quantity)
+        .filter(models.RecipeIngredient.grams.is_(None))
+        .distinct()
+    ]
+    if None in quantities:
+        quantities.remove(None)
+        db.execute(text(
+            "UPDATE recipe_ingredients SET amount = :amount, unit = :unit, grams = :grams "
+            "WHERE quantity IS NULL AND grams IS NULL"
+        ), nutrition_calculator.quantity_columns(None))
+
+    for i in range(0, len(quantities), batch_size):
+        parsed = [nutrition_calculator.quantity_columns(quantity) for quantity in quantities[i:i + batch_size]]
+        db.execute(text(
+            "UPDATE recipe_ingredients AS ri SET amount = v.amount, unit = v.unit, grams = v.grams "
+            "FROM unnest(CAST(:quantity AS VARCHAR[]), CAST(:amount AS DOUBLE PRECISION[]), "
+            "CAST(:unit AS VARCHAR[]), CAST(:grams AS DOUBLE PRECISION[])) AS v(quantity, amount, unit, grams) "
+            "WHERE ri.quantity = v.quantity AND ri.grams IS NULL"
+        ), {key: [values[key] for values in parsed] for key in ("quantity", "amount", "unit", "grams")})
+
+
+def add_recipe_ingredient_quantities(db: Session):
+    db.execute(text("ALTER TABLE recipe_ingredients ADD COLUMN IF NOT EXISTS amount DOUBLE PRECISION"))
+    db.execute(text("ALTER TABLE recipe_ingredients ADD COLUMN IF NOT EXISTS unit VARCHAR"))
+    db.execute(text("ALTER TABLE recipe_ingredients ADD COLUMN IF NOT EXISTS grams DOUBLE PRECISION"))
+    backfill_recipe_ingredient_quantities(db)
+
+
+def add_ingredient_food_mapping(db: Session):
+    db.execute(text(
+        "ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS food_id INTEGER "
+        "REFERENCES food_nutrition (food_id) ON DELETE SET NULL"
+    ))
+    db.execute(text("ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS match_score DOUBLE PRECISION"))
+    db.execute(text("ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS match_is_manual BOOLEAN NOT NULL DEFAULT false"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_ingredients_food_id ON ingredients (food_id)"))
+
+
+def add_recipe_search_vector(db: Session):
+    db.execute(text("ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_vector TSVECTOR"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_recipes_search_vector ON recipes USING gin (search_vector)"))
+    # Filled by 0004: refresh_search_vectors also writes search_title, which
+    # does not exist yet at this point.
+
+
+def add_recipe_title_trigram_index(db: Session):
+    db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    db.execute(text("ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_title VARCHAR"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_recipes_search_title_trgm ON recipes USING gin (search_title gin_trgm_ops)"))
+    # Fills search_vector (added by 0003) and search_title together.
+    recipe_search.refresh_search_vectors(db)
+
+
+def add_listing_order_indexes(db: Session):
+    db.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_recipes_date_recipe_id "
+        "ON recipes (date DESC NULLS LAST, recipe_id DESC)"
+    ))
+    db.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_recipes_user_id_date_recipe_id "
+        "ON recipes (user_id, date DESC NULLS LAST, recipe_id DESC)"
+    ))
+    db.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_saved_recipes_user_id_saved_at "
+        "ON user_saved_recipes (user_id, saved_at DESC NULLS LAST, recipe_id DESC)"
+    ))
+
+
+def add_recipe_versions(db: Session):
+    db.execute(text("ALTER TABLE recipes ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0"))
+    db.execute(text(
+        "CREATE TABLE IF NOT EXISTS catalog_versions (name VARCHAR PRIMARY KEY, version BIGINT NOT NULL)"
+    ))
+
+
+def add_name_lower_indexes(db: Session):
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_tags_lower_tag_name ON tags (lower(tag_name))"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_ingredients_lower_name ON ingredients (lower(name))"))
+
+
+
+def add_import_job_bytes(db: Session):
+    db.execute(text("ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS size_bytes BIGINT"))
+    db.execute(text("ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS bytes_read BIGINT NOT NULL DEFAULT 0"))
+
+
+
+def add_recipe_version_sequence(db: Session):
+    db.execute(text("CREATE SEQUENCE IF NOT EXISTS recipe_versions_seq"))
+    # Versions so far came from the catalog counter; carry on above them.
+    db.execute(text(
+        "SELECT setval('recipe_versions_seq', GREATEST("
+        "(SELECT COALESCE(MAX(version), 0) FROM recipes), "
+        "(SELECT COALESCE(MAX(version), 0) FROM catalog_versions), "
+        "(SELECT last_value FROM recipe_versions_seq), 1))"
+    ))
+
+
+MIGRATIONS = [
+    ("0001_recipe_ingredient_quantities", add_recipe_ingredient_quantities),
+    ("0002_ingredient_food_mapping", add_ingredient_food_mapping),
+    ("0003_recipe_search_vector", add_recipe_search_vector),
+    ("0004_recipe_title_trigram_index", add_recipe_title_trigram_index),
+    ("0005_listing_order_indexes", add_listing_order_indexes),
+    ("0006_recipe_versions", add_recipe_versions),
+    ("0007_name_lower_indexes", add_name_lower_indexes),
+    ("0008_import_job_bytes", add_import_job_bytes),
+    ("0009_recipe_version_sequence", add_recipe_version_sequence),
+]
+
+
+def run_migrations():
+    db = SessionLocal()
+    try:
+        db.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+        db.commit()
+        applied = {name for (name,) in db.execute(text("SELECT name FROM schema_migrations"))}
+
+        for name, migrate in MIGRATIONS:
+            if name in applied:
+                continue
+            print(f"Applying migration {name}...")
+            migrate(db)
+            db.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+            db.commit()
+
+        # Not a migration: keeps food_nutrition in line with nutrition_final.csv.
+        nutrition_calculator.sync_food_nutrition(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Text, Float, Boolean, UniqueConstraint
-from sqlalchemy.orm import relationship, Mapped
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime, func, Text, Float, Boolean, UniqueConstraint, Index, JSON, Sequence
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, Mapped, deferred
 from database import Base
 from typing import List
 
@@ -49,6 +50,23 @@ class Recipe(Base):
     fat = Column(Float, nullable=True)
     carbs = Column(Float, nullable=True)
 
+    # Weighted title/ingredients/description lexemes and the folded title used
+    # for typeahead, both maintained by recipe_search. The trigram index on
+    # search_title needs pg_trgm and is created in migrations. Deferred: they
+    # are only used inside queries and must not end up in responses.
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    search_title = deferred(Column(String, nullable=True))
+
+    # Bumped by every write to the recipe or to what its pages show; see versioning.
+    version = Column(BigInteger, nullable=False, server_default="0")
+
+    __table_args__ = (
+        Index("ix_recipes_search_vector", "search_vector", postgresql_using="gin"),
+        # Match the listing order so cursor pagination is an index range scan.
+        Index("ix_recipes_date_recipe_id", date.desc().nullslast(), recipe_id.desc()),
+        Index("ix_recipes_user_id_date_recipe_id", user_id, date.desc().nullslast(), recipe_id.desc()),
+    )
+
     reviews: Mapped[List["Review"]] = relationship(back_populates="recipe", cascade="all, delete-orphan")
     ingredients_association = relationship("RecipeIngredient", back_populates="recipe", cascade="all, delete-orphan")
     steps = relationship("Step", back_populates="recipe", cascade="all, delete-orphan")
@@ -83,6 +101,10 @@ class UserSavedRecipe(Base):
     recipe_id = Column(Integer, ForeignKey("recipes.recipe_id"), primary_key=True)
     saved_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_user_saved_recipes_user_id_saved_at", user_id, saved_at.desc().nullslast(), recipe_id.desc()),
+    )
+
     user = relationship("User", back_populates="saved_recipes_association")
     recipe = relationship("Recipe", back_populates="saved_by_users_association")
 
@@ -98,6 +120,19 @@ class Ingredient(Base):
 
     ingredient_id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
+
+    # Names are looked up case-insensitively when recipes are written.
+    __table_args__ = (
+        Index("ix_ingredients_lower_name", func.lower(name)),
+    )
+
+    # Row of food_nutrition this ingredient is counted as. match_score is NULL
+    # until the name has been matched; manual matches are set by an admin and
+    # survive a reload of the nutrition table.
+    food_id = Column(Integer, ForeignKey("food_nutrition.food_id", ondelete="SET NULL"), nullable=True, index=True)
+    match_score = Column(Float, nullable=True)
+    match_is_manual = Column(Boolean, nullable=False, default=False, server_default="false")
+    food = relationship("FoodNutrition", back_populates="ingredients")
     recipes_association = relationship("RecipeIngredient", back_populates="ingredient", overlaps="recipes")
     
     recipes: Mapped[List["RecipeIngredient"]] = relationship(back_populates="ingredient", cascade="all, delete-orphan")
@@ -108,6 +143,12 @@ class RecipeIngredient(Base):
     recipe_id = Column(Integer, ForeignKey("recipes.recipe_id"), primary_key=True)
     ingredient_id = Column(Integer, ForeignKey("ingredients.ingredient_id"), primary_key=True)
     quantity = Column(String)
+    # Parsed from `quantity` on write so nutrition never re-parses free text.
+    # `unit` is NULL when the unit was not recognised; such lines weigh
+    # UNKNOWN_UNIT_GRAMS like they always have in the nutrition calculator.
+    amount = Column(Float, nullable=True)
+    unit = Column(String, nullable=True)
+    grams = Column(Float, nullable=True)
     recipe = relationship("Recipe", back_populates="ingredients_association")
     ingredient = relationship("Ingredient", back_populates="recipes_association")
 
@@ -123,6 +164,9 @@ class Tag(Base):
     __tablename__ = "tags"
     tag_id = Column(Integer, primary_key=True, index=True)
     tag_name = Column(String, unique=True)
+    __table_args__ = (
+        Index("ix_tags_lower_tag_name", func.lower(tag_name)),
+    )
     recipes_association = relationship("RecipeTag", back_populates="tag")
 
 class RecipeTag(Base):
@@ -174,3 +218,76 @@ class CustomMealPlan(Base):
     user = relationship("User", back_populates="custom_meal_plan")
     recipe = relationship("Recipe", back_populates="custom_meal_plans")
 
+
+class IngredientMatchCache(Base):
+    __tablename__ = "ingredient_match_cache"
+
+    # Rows are keyed by the content hash of nutrition_final.csv so a new table
+    # version never serves matches computed against the old one.
+    nutrition_hash = Column(String(64), primary_key=True)
+    raw_name = Column(String, primary_key=True)
+    matched_name = Column(String, nullable=True)
+    score = Column(Float, nullable=False)
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, nullable=False)
+    fat = Column(Float, nullable=False)
+    carbs = Column(Float, nullable=False)
+
+
+class FoodNutrition(Base):
+    __tablename__ = "food_nutrition"
+
+    food_id = Column(Integer, primary_key=True, index=True)
+    # Lowercased Name column of nutrition_final.csv; values are per 100g.
+    name = Column(String, unique=True, nullable=False)
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, nullable=False)
+    fat = Column(Float, nullable=False)
+    carbs = Column(Float, nullable=False)
+    nutrition_hash = Column(String(64), nullable=False)
+
+    ingredients = relationship("Ingredient", back_populates="food")
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    # Named counters maintained by versioning; the "catalog" row changes
+    # whenever any recipe listing, tag or ingredient count can.
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+
+# Source of Recipe.version; never restarted, unlike the recipe id sequence.
+RECIPE_VERSION_SEQUENCE = Sequence("recipe_versions_seq", metadata=Base.metadata)
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "recipes" or "meal_plans"; run by import_jobs.
+    kind = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    delete_existing = Column(Boolean, nullable=False, default=False)
+    # queued, running, succeeded, failed or cancelled.
+    status = Column(String, nullable=False, default="queued")
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+
+    # Records committed so far; `processed` moves in the same transaction as
+    # each chunk, so it is also where a resumed job picks up. resumed_from is
+    # `processed` when the current run started. The file is read once, so
+    # `total` is only known when the reader reaches its end; until then
+    # progress is the share of the file read by the current run.
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    resumed_from = Column(Integer, nullable=False, default=0)
+    size_bytes = Column(BigInteger, nullable=True)
+    bytes_read = Column(BigInteger, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=False, default=list)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,185 @@
+"""
+Bad-word filter shared by recipes and reviews.
+
+The terms in Data/bad_words.txt (one per line) are compiled once into an
+Aho-Corasick automaton, so checking a text costs one pass over it however long
+the list is, and a whole recipe payload is checked field after field in a
+single pass (flagged_field). The file is stat()ed at most every
+CHECK_INTERVAL seconds and recompiled when it changed.
+
+Matching ignores case. Two options shape it:
+
+    fold_diacritics  the text is also read with its Vietnamese diacritics
+                     removed, so a term written without them ("trash") catches
+                     "trásh" too. A term written with diacritics only matches
+                     that spelling: folding it would make "đĩ" flag "đi".
+    whole_words      terms only match between word boundaries, so "ass" does
+                     not flag "class". Off by default, as terms have always
+                     matched anywhere in a word.
+"""
+import os
+import time
+import unicodedata
+from collections import deque
+from pathlib import Path
+from threading import Lock
+
+BAD_WORDS_FILE = Path(__file__).parent / "Data" / "bad_words.txt"
+FOLD_DIACRITICS = True
+WHOLE_WORDS = False
+# How often (in seconds) bad_words.txt is stat()ed to pick up edits.
+CHECK_INTERVAL = 5
+
+
+def _fold_table():
+    table = {ord("đ"): "d", ord("Đ"): "d"}
+    for code in list(range(0xC0, 0x250)) + list(range(0x1E00, 0x1F00)):
+        base = unicodedata.normalize("NFD", chr(code))[0]
+        if base != chr(code) and base.isascii():
+            table[code] = base.lower()
+    # Marks left over from text that was not composed.
+    for code in range(0x300, 0x370):
+        table[code] = None
+    return table
+
+
+FOLD_TABLE = _fold_table()
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def fold(text: str) -> str:
+    """Lowercases text and strips its Vietnamese diacritics: "Đậu phụ" -> "dau phu"."""
+    return normalize(text).translate(FOLD_TABLE)
+
+
+class BadWordFilter:
+    """An Aho-Corasick automaton over a list of terms."""
+
+    def __init__(self, terms, fold_diacritics=FOLD_DIACRITICS, whole_words=WHOLE_WORDS, file_signature=None):
+        self.fold_diacritics = fold_diacritics
+        self.whole_words = whole_words
+        self.file_signature = file_signature
+        # Node 0 is the root. goto[node] maps a character to the next node,
+        # outputs[node] holds the lengths of the terms that end there,
+        # including those reached through failure links.
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        self.term_count = 0
+        # Only terms with diacritics need the unfolded text scanned too.
+        self.has_marked_terms = False
+
+        for term in dict.fromkeys(normalize(term.strip()) for term in terms):
+            if term:
+                self._add(term)
+        self._link()
+
+    @classmethod
+    def from_file(cls, path: Path, **options):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return cls([], file_signature=None, **options)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f, file_signature=(stat.st_mtime_ns, stat.st_size), **options)
+
+    def _add(self, term):
+        node = 0
+        for char in term:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+            node = next_node
+        self.outputs[node] = (len(term),)
+        self.term_count += 1
+        if fold(term) != term:
+            self.has_marked_terms = True
+
+    def _link(self):
+        """Sets failure links breadth-first and merges outputs along them."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                if self.outputs[self.fail[child]]:
+                    self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def _scan(self, text: str) -> bool:
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                if not self.whole_words:
+                    return True
+                if end < len(text) and text[end].isalnum():
+                    continue
+                for length in outputs[node]:
+                    start = end - length
+                    if start == 0 or not text[start - 1].isalnum():
+                        return True
+        return False
+
+    def contains(self, text) -> bool:
+        """Whether the text contains any term."""
+        if not text or not self.term_count:
+            return False
+        normalized = normalize(text)
+        if self.fold_diacritics:
+            if self._scan(normalized.translate(FOLD_TABLE)):
+                return True
+            return self.has_marked_terms and self._scan(normalized)
+        return self._scan(normalized)
+
+    def flagged_field(self, fields):
+        """The label of the first (label, text) pair whose text contains a term, or None."""
+        for label, text in fields:
+            if self.contains(text):
+                return label
+        return None
+
+
+FILTER = BadWordFilter.from_file(BAD_WORDS_FILE)
+
+_filter_lock = Lock()
+_filter_checked_at = time.monotonic()
+
+
+def refresh_filter() -> BadWordFilter:
+    """Recompiles the filter when bad_words.txt changed on disk."""
+    global FILTER, _filter_checked_at
+    now = time.monotonic()
+    if now - _filter_checked_at < CHECK_INTERVAL:
+        return FILTER
+    with _filter_lock:
+        _filter_checked_at = now
+        try:
+            stat = os.stat(BAD_WORDS_FILE)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature != FILTER.file_signature:
+            FILTER = BadWordFilter.from_file(BAD_WORDS_FILE)
+    return FILTER
+
+
+def contains_bad_word(text) -> bool:
+    return refresh_filter().contains(text)
+
+
+def flagged_field(fields):
+    return refresh_filter().flagged_field(fields)
@@ -1,67 +1,319 @@
 # backend/nutrition_calculator.py
+import hashlib
+import os
+import time
+from threading import Lock
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 import re
-from utils import quantity_to_gram
+import unicodedata
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from utils import quantity_to_gram, UNIT_ALIASES
 from pathlib import Path
+from cache import LRUCache
+import models
 
 CSV_PATH = Path(__file__).parent / "Data" / "nutrition_final.csv"
 
+MATCH_THRESHOLD = 80
+
+# Each alias is scored with all four scorers; the best one decides the match
+# and the mean breaks ties between equally good aliases.
+SCORERS = (fuzz.ratio, fuzz.partial_ratio, fuzz.token_sort_ratio, fuzz.token_set_ratio)
+
+
+class NutritionMatcher:
+    """
+    Fuzzy matcher over the nutrition table. The CSV is parsed once into flat
+    arrays so a lookup is a handful of batched rapidfuzz calls instead of a
+    Python loop over every alias.
+    """
+
+    def __init__(self, names, nutrients, content_hash="", file_signature=None):
+        self.names = names
+        self.nutrients = nutrients
+        self.content_hash = content_hash
+        self.file_signature = file_signature
+
+        aliases = []
+        alias_food = []
+        for food_idx, name in enumerate(names):
+            for part in name.split(" - "):
+                aliases.append(part.strip())
+                alias_food.append(food_idx)
+        self.aliases = aliases
+        self.alias_food = np.asarray(alias_food, dtype=np.intp)
+
+    @classmethod
+    def from_csv(cls, path):
+        if not path.is_file():
+            print(f"Error: Nutrition data file not found at {path}")
+            return cls([], np.zeros((0, 4)))
+
+        raw = path.read_bytes()
+        stat = path.stat()
+        df = pd.read_csv(path, encoding='utf-8')
+        nutrient_dict = {
+            name.lower(): (energy, protein, fat, carbs)
+            for name, energy, protein, fat, carbs in zip(
+                df['Name'], df['Energy'], df['Protein'], df['Fat'], df['Carbohydrate']
+            )
+        }
+        nutrients = np.array(list(nutrient_dict.values()), dtype=np.float64).reshape(-1, 4)
+        return cls(
+            list(nutrient_dict.keys()),
+            nutrients,
+            content_hash=hashlib.sha256(raw).hexdigest(),
+            file_signature=(stat.st_mtime_ns, stat.st_size),
+        )
+
+    def best_match(self, raw_name):
+        """Returns (food index, score) of the best alias, or (None, 0) if nothing scores."""
+        if not self.aliases:
+            return None, 0
+
+        query = [raw_name.lower()]
+        scores = [
+            process.cdist(query, self.aliases, scorer=scorer, dtype=np.float64)[0]
+            for scorer in SCORERS
+        ]
+        max_scores = np.maximum.reduce(scores)
+        mean_scores = (scores[0] + scores[1] + scores[2] + scores[3]) / len(scores)
+
+        best_score = max_scores.max()
+        if best_score <= 0:
+            return None, 0
+
+        # The first alias with the highest mean among those sharing the best
+        # score wins, exactly as the sequential max/mean comparison did.
+        candidates = np.flatnonzero(max_scores == best_score)
+        best_alias = candidates[np.argmax(mean_scores[candidates])]
+        return int(self.alias_food[best_alias]), float(best_score)
+
+    def resolve(self, raw_name):
+        """Returns (matched food name, score, nutrients per 100g) for an ingredient name."""
+        food_idx, score = self.best_match(raw_name)
+        if score > MATCH_THRESHOLD and food_idx is not None:
+            return self.names[food_idx], score, self.nutrients[food_idx].tolist()
+        return None, score, [0, 0, 0, 0]
+
+    def match(self, raw_name):
+        matched_name, _, nutrients = self.resolve(raw_name)
+        return matched_name, nutrients
+
+
+MATCHER = NutritionMatcher.from_csv(CSV_PATH)
+
 def match_ingredient(raw_name):
-    if not CSV_PATH.is_file():
-        print(f"Error: Nutrition data file not found at {CSV_PATH}")
-        return None, [0, 0, 0, 0]
-
-    df = pd.read_csv(CSV_PATH, encoding='utf-8')
-    nutrient_dict = {
-        row['Name'].lower(): [float(row['Energy']), float(row['Protein']), float(row['Fat']), float(row['Carbohydrate'])]
-        for _, row in df.iterrows()
+    return MATCHER.match(raw_name)
+
+
+# How often (in seconds) the CSV is stat()ed to detect a new nutrition table.
+MATCHER_CHECK_INTERVAL = 5
+MATCH_CACHE = LRUCache(maxsize=4096)
+MATCH_CACHE_COUNTERS = {"db_hits": 0, "fuzzy_matches": 0}
+# Request threads resolve ingredients concurrently; += on the dict is not atomic.
+_counters_lock = Lock()
+
+_matcher_lock = Lock()
+_matcher_checked_at = time.monotonic()
+_purged_hashes = set()
+
+
+def refresh_matcher():
+    """
+    Reloads the nutrition table when the CSV on disk changed. Cached matches are
+    tied to the content hash, so a reload also empties the in-process cache.
+    """
+    global MATCHER, _matcher_checked_at
+    now = time.monotonic()
+    if now - _matcher_checked_at < MATCHER_CHECK_INTERVAL:
+        return MATCHER
+    with _matcher_lock:
+        _matcher_checked_at = now
+        try:
+            stat = os.stat(CSV_PATH)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature == MATCHER.file_signature:
+            return MATCHER
+        matcher = NutritionMatcher.from_csv(CSV_PATH)
+        if matcher.content_hash != MATCHER.content_hash:
+            MATCH_CACHE.clear()
+        MATCHER = matcher
+    return MATCHER
+
+
+def normalize_ingredient_name(raw_name):
+    return " ".join(raw_name.lower().split())
+
+
+def _load_cached_matches(db: Session, nutrition_hash, keys):
+    if nutrition_hash not in _purged_hashes:
+        db.query(models.IngredientMatchCache).filter(
+            models.IngredientMatchCache.nutrition_hash != nutrition_hash
+        ).delete(synchronize_session=False)
+        _purged_hashes.add(nutrition_hash)
+
+    rows = db.query(models.IngredientMatchCache).filter(
+        models.IngredientMatchCache.nutrition_hash == nutrition_hash,
+        models.IngredientMatchCache.raw_name.in_(keys)
+    )
+    return {row.raw_name: (row.matched_name, row.score, [row.calories, row.protein, row.fat, row.carbs]) for row in rows}
+
+
+def _load_cached_match(db: Session, nutrition_hash, key):
+    return _load_cached_matches(db, nutrition_hash, [key]).get(key)
+
+
+def _store_cached_matches(db: Session, nutrition_hash, entries):
+    if not entries:
+        return
+    db.execute(
+        insert(models.IngredientMatchCache).values([
+            {
+                "nutrition_hash": nutrition_hash,
+                "raw_name": key,
+                "matched_name": matched_name,
+                "score": score,
+                "calories": nutrients[0],
+                "protein": nutrients[1],
+                "fat": nutrients[2],
+                "carbs": nutrients[3],
+            }
+            for key, (matched_name, score, nutrients) in entries.items()
+        ]).on_conflict_do_nothing()
+    )
+
+
+def _store_cached_match(db: Session, nutrition_hash, key, entry):
+    _store_cached_matches(db, nutrition_hash, {key: entry})
+
+
+def count_match(counter, n=1):
+    with _counters_lock:
+        MATCH_CACHE_COUNTERS[counter] += n
+
+
+def resolve_ingredient(raw_name, db: Session = None):
+    """
+    Resolves an ingredient name to (matched food name, score, nutrients per 100g).
+    Lookups go through the in-process LRU, then the ingredient_match_cache table
+    when a session is given, and only fall back to fuzzy matching on a full miss.
+    Callers own the transaction; new cache rows are committed with their work.
+    """
+    matcher = refresh_matcher()
+    key = normalize_ingredient_name(raw_name)
+    cache_key = (matcher.content_hash, key)
+
+    entry = MATCH_CACHE.get(cache_key)
+    if entry is not None:
+        return entry
+
+    if db is not None:
+        entry = _load_cached_match(db, matcher.content_hash, key)
+        if entry is not None:
+            count_match("db_hits")
+
+    if entry is None:
+        entry = matcher.resolve(key)
+        count_match("fuzzy_matches")
+        if db is not None:
+            _store_cached_match(db, matcher.content_hash, key, entry)
+
+    MATCH_CACHE.put(cache_key, entry)
+    return entry
+
+
+def resolve_ingredients(raw_names, db: Session):
+    """
+    resolve_ingredient for many names at once: the names the LRU does not know
+    are looked up in ingredient_match_cache with one query, and the new fuzzy
+    matches are stored with one insert. Returns {raw name: entry}.
+    """
+    matcher = refresh_matcher()
+    keys = {raw_name: normalize_ingredient_name(raw_name) for raw_name in raw_names}
+    entries = {}
+    for key in set(keys.values()):
+        entry = MATCH_CACHE.get((matcher.content_hash, key))
+        if entry is not None:
+            entries[key] = entry
+
+    missing = [key for key in set(keys.values()) if key not in entries]
+    if missing:
+        cached = _load_cached_matches(db, matcher.content_hash, missing)
+        count_match("db_hits", len(cached))
+        matched = {key: matcher.resolve(key) for key in missing if key not in cached}
+        count_match("fuzzy_matches", len(matched))
+        _store_cached_matches(db, matcher.content_hash, matched)
+        for key, entry in {**cached, **matched}.items():
+            MATCH_CACHE.put((matcher.content_hash, key), entry)
+            entries[key] = entry
+
+    return {raw_name: entries[key] for raw_name, key in keys.items()}
+
+
+def match_cache_stats():
+    stats = MATCH_CACHE.stats()
+    with _counters_lock:
+        counters = dict(MATCH_CACHE_COUNTERS)
+    return {
+        "nutrition_hash": MATCHER.content_hash,
+        "memory_hits": stats["hits"],
+        "memory_misses": stats["misses"],
+        "memory_size": stats["size"],
+        "memory_maxsize": stats["maxsize"],
+        **counters,
     }
 
-    raw_name_lower = raw_name.lower()
-    best_match = None
-    max_score = 0
-    best_mean_score = 0
-
-    for std_ing in nutrient_dict.keys():
-        std_parts = [part.strip() for part in std_ing.split(" - ")]
-        for part in std_parts:
-            scores = [
-                fuzz.ratio(raw_name_lower, part),
-                fuzz.partial_ratio(raw_name_lower, part),
-                fuzz.token_sort_ratio(raw_name_lower, part),
-                fuzz.token_set_ratio(raw_name_lower, part)
-            ]
-            current_score = max(scores)
-            mean_score = sum(scores) / len(scores)
-
-            if current_score > max_score:
-                max_score = current_score
-                best_match = std_ing
-                best_mean_score = mean_score
-            elif current_score == max_score and mean_score > best_mean_score:
-                best_match = std_ing
-                best_mean_score = mean_score
-
-    if max_score > 80 and best_match:
-        return best_match, nutrient_dict[best_match]
-    else:
-        return None, [0, 0, 0, 0]
+UNICODE_FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅕": 0.2, "⅛": 0.125}
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+AMOUNT_PATTERN = re.compile(
+    rf"""^\s*(?:
+        (?P<whole>\d+)\s+(?P<mixed_num>\d+)\s*/\s*(?P<mixed_den>\d+)   # 1 1/2
+        | (?P<num>\d+)\s*/\s*(?P<den>\d+)                               # 1/2
+        | (?P<low>{_NUMBER})\s*[-–]\s*(?P<high>{_NUMBER})                 # 2-3, 1,5 - 2
+        | (?P<value>{_NUMBER})                                             # 200, 1,5
+        | (?P<glyph>[{"".join(UNICODE_FRACTIONS)}])                        # ½
+    )\s*(?P<unit>.*)$""",
+    re.VERBOSE | re.DOTALL,
+)
+
+def _to_float(number):
+    return float(number.replace(",", "."))
 
 def parse_quantity_unit(text):
+    """
+    Splits a quantity such as "200 g", "1/2 trái", "2-3 quả" or "1,5 kg" into
+    (amount, lowercased unit text). Ranges resolve to their midpoint; a bare
+    number is read as grams and text without a leading number as 0 g.
+    """
     if not isinstance(text, str):
         return 0, "g"
-    pattern = r"^([\d,.]+)\s*(.+)$"
-    match = re.match(pattern, text.strip())
-    if match:
-        quantity = float(match.group(1).replace(",", "."))
-        unit = match.group(2).strip().lower()
-        return quantity, unit
+    match = AMOUNT_PATTERN.match(text)
+    if not match:
+        return 0, "g"
+
+    if match["whole"] is not None:
+        den = int(match["mixed_den"])
+        amount = int(match["whole"]) + (int(match["mixed_num"]) / den if den else 0)
+    elif match["num"] is not None:
+        den = int(match["den"])
+        amount = int(match["num"]) / den if den else 0
+    elif match["low"] is not None:
+        amount = (_to_float(match["low"]) + _to_float(match["high"])) / 2
+    elif match["value"] is not None:
+        amount = _to_float(match["value"])
     else:
-        try:
-            return float(text.strip()), "g"
-        except (ValueError, TypeError):
-            return 0, "g"
+        amount = UNICODE_FRACTIONS[match["glyph"]]
+
+    unit = unicodedata.normalize("NFC", match["unit"]).strip().lower()
+    return amount, unit or "g"
 
 def match_quantity(unit, quantity_map):
     best_match = unit
@@ -75,13 +327,84 @@ def match_quantity(unit, quantity_map):
         return best_match, quantity_map[best_match]
     return None, 0
 
-def normalize_quantity(quantity):
+
+class UnitRecognizer:
+    """
+    Longest-match recognizer for the units in quantity_to_gram and their
+    aliases. Unit text is walked once through a character trie; only text
+    that does not start with a known unit falls back to fuzzy matching, and
+    those results are memoized.
+    """
+
+    def __init__(self, quantity_map, aliases):
+        self.quantity_map = quantity_map
+        self._trie = {}
+        for unit in quantity_map:
+            self._insert(unit, unit)
+        for alias, unit in aliases.items():
+            self._insert(alias, unit)
+        self._fuzzy_cache = {}
+        self._fuzzy_lock = Lock()
+
+    def _insert(self, text, canonical):
+        node = self._trie
+        for char in text:
+            node = node.setdefault(char, {})
+        node[None] = canonical
+
+    def _longest_prefix(self, unit):
+        node = self._trie
+        best = None
+        for i, char in enumerate(unit):
+            node = node.get(char)
+            if node is None:
+                break
+            # A unit only counts if it ends on a word boundary, so "lát" does
+            # not swallow the start of "lá" nor "g" the start of "gói".
+            if None in node and (i + 1 == len(unit) or not unit[i + 1].isalnum()):
+                best = node[None]
+        return best
+
+    def recognize(self, unit):
+        """Returns (canonical unit, grams per unit), or (None, 0) if unknown."""
+        canonical = self._longest_prefix(unit)
+        if canonical is not None:
+            return canonical, self.quantity_map[canonical]
+
+        cached = self._fuzzy_cache.get(unit)
+        if cached is None:
+            cached = match_quantity(unit, self.quantity_map)
+            with self._fuzzy_lock:
+                if len(self._fuzzy_cache) >= 4096:
+                    self._fuzzy_cache.clear()
+                self._fuzzy_cache[unit] = cached
+        return cached
+
+
+UNIT_RECOGNIZER = UnitRecognizer(quantity_to_gram, UNIT_ALIASES)
+
+# Weight assumed for a line whose unit is unknown (the historical 0.01 factor).
+UNKNOWN_UNIT_GRAMS = 1.0
+
+def parse_quantity(quantity):
+    """Returns (amount, canonical unit or None, estimated grams) for a quantity string."""
     amount, unit = parse_quantity_unit(quantity)
-    match, values = match_quantity(unit, quantity_to_gram)
-    return amount, amount * values / 100 if values > 0 else 0.01
+    match, values = UNIT_RECOGNIZER.recognize(unit)
+    if values > 0:
+        return amount, match, amount * values
+    return amount, None, UNKNOWN_UNIT_GRAMS
 
-def calculate_nutrition(ingredient_pair):
-    _, nutrition_per_100g = match_ingredient(ingredient_pair[0])
+def quantity_columns(quantity):
+    """Column values for a RecipeIngredient row holding `quantity`."""
+    amount, unit, grams = parse_quantity(quantity)
+    return {"quantity": quantity, "amount": amount, "unit": unit, "grams": grams}
+
+def normalize_quantity(quantity):
+    amount, _, grams = parse_quantity(quantity)
+    return amount, grams / 100
+
+def calculate_nutrition(ingredient_pair, db: Session = None):
+    _, _, nutrition_per_100g = resolve_ingredient(ingredient_pair[0], db)
     if nutrition_per_100g is None:
         return [0, 0, 0, 0]
         
@@ -92,4 +415,164 @@ def calculate_nutrition(ingredient_pair):
     fat = nutrition_per_100g[2] * normalized_value
     carbs = nutrition_per_100g[3] * normalized_value
 
-    return [calories, protein, fat, carbs]
\ No newline at end of file
+    return [calories, protein, fat, carbs]
+
+
+NUTRIENT_KEYS = ("calories", "protein", "fat", "carbs")
+
+def custom_scale(x, a=800, b=1500, x_min=500, x_max=3000):
+    return a + (x - x_min) * (b - a) / (x_max - x_min) if x > 1000 else x
+
+_food_ids = {}
+
+def sync_food_nutrition(db: Session):
+    """
+    Loads the nutrition table into food_nutrition. Nothing happens while the
+    table already holds the current CSV; after a change the rows are upserted by
+    name, foods that disappeared are dropped and every automatic ingredient
+    match is cleared so it is redone against the new table. Callers commit.
+    """
+    matcher = refresh_matcher()
+    stale = db.query(models.FoodNutrition.food_id)\
+        .filter(models.FoodNutrition.nutrition_hash != matcher.content_hash).first()
+    current = db.query(models.FoodNutrition.food_id)\
+        .filter(models.FoodNutrition.nutrition_hash == matcher.content_hash).first()
+    if current is not None and stale is None:
+        return
+
+    if matcher.names:
+        stmt = insert(models.FoodNutrition).values([
+            {
+                "name": name,
+                "calories": nutrients[0],
+                "protein": nutrients[1],
+                "fat": nutrients[2],
+                "carbs": nutrients[3],
+                "nutrition_hash": matcher.content_hash,
+            }
+            for name, nutrients in zip(matcher.names, matcher.nutrients.tolist())
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[models.FoodNutrition.name],
+            set_={key: stmt.excluded[key] for key in ("calories", "protein", "fat", "carbs", "nutrition_hash")},
+        ))
+    db.query(models.FoodNutrition).filter(
+        models.FoodNutrition.nutrition_hash != matcher.content_hash
+    ).delete(synchronize_session=False)
+    db.query(models.Ingredient).filter(models.Ingredient.match_is_manual.is_(False)).update(
+        {models.Ingredient.food_id: None, models.Ingredient.match_score: None},
+        synchronize_session=False
+    )
+    _food_ids.clear()
+
+def food_ids_by_name(db: Session):
+    """Maps matched food names to food_nutrition ids for the current table."""
+    content_hash = MATCHER.content_hash
+    ids = _food_ids.get(content_hash)
+    if ids is None:
+        sync_food_nutrition(db)
+        ids = dict(
+            db.query(models.FoodNutrition.name, models.FoodNutrition.food_id)
+            .filter(models.FoodNutrition.nutrition_hash == content_hash)
+            .all()
+        )
+        _food_ids.clear()
+        _food_ids[content_hash] = ids
+    return ids
+
+def food_columns(matched_name, score, db: Session):
+    """Ingredient column values for a resolved (matched name, score) pair."""
+    food_id = food_ids_by_name(db).get(matched_name) if matched_name else None
+    return {"food_id": food_id, "match_score": score}
+
+def ingredient_food_columns(name, db: Session):
+    """Matches an ingredient name and returns its food_id/match_score column values."""
+    matched_name, score, _ = resolve_ingredient(name, db)
+    return food_columns(matched_name, score, db)
+
+def prepare_recipe_ingredients(recipe_ids, db: Session):
+    """
+    Makes sure every ingredient line of the given recipes has parsed grams and a
+    food match, so their nutrition can be summed in SQL. In steady state this is
+    one query that finds nothing to do.
+    """
+    pending = db.query(
+        models.RecipeIngredient.recipe_id,
+        models.RecipeIngredient.ingredient_id,
+        models.RecipeIngredient.quantity,
+        models.RecipeIngredient.grams,
+        models.Ingredient.name,
+        models.Ingredient.match_score
+    ).join(models.Ingredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)\
+        .filter(
+            models.RecipeIngredient.recipe_id.in_(recipe_ids),
+            or_(models.RecipeIngredient.grams.is_(None), models.Ingredient.match_score.is_(None))
+        ).all()
+    if not pending:
+        return
+
+    unmatched = {row.ingredient_id: row.name for row in pending if row.match_score is None}
+    if unmatched:
+        db.execute(update(models.Ingredient), [
+            {"ingredient_id": ingredient_id, **ingredient_food_columns(name, db)}
+            for ingredient_id, name in unmatched.items()
+        ])
+
+    unparsed = [row for row in pending if row.grams is None]
+    if unparsed:
+        db.execute(update(models.RecipeIngredient), [
+            {"recipe_id": row.recipe_id, "ingredient_id": row.ingredient_id, **quantity_columns(row.quantity)}
+            for row in unparsed
+        ])
+
+def nutrition_totals_query(db: Session):
+    """Raw calorie/protein/fat/carb sums per recipe, as one join over the food mapping."""
+    def total(column):
+        return func.coalesce(func.sum(column * models.RecipeIngredient.grams / 100), 0.0)
+
+    return db.query(
+        models.RecipeIngredient.recipe_id,
+        total(models.FoodNutrition.calories),
+        total(models.FoodNutrition.protein),
+        total(models.FoodNutrition.fat),
+        total(models.FoodNutrition.carbs)
+    ).join(models.Ingredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)\
+        .outerjoin(models.FoodNutrition, models.FoodNutrition.food_id == models.Ingredient.food_id)\
+        .group_by(models.RecipeIngredient.recipe_id)
+
+def scale_nutrition(raw_totals, scale_all=False):
+    """
+    Rounds raw totals for storage on Recipe. The recipe nutrition endpoint
+    scales every value with custom_scale, meal plans only scale calories.
+    """
+    if scale_all:
+        values = [custom_scale(value) for value in raw_totals]
+    else:
+        values = [custom_scale(raw_totals[0]), *raw_totals[1:]]
+    return {key: round(float(value), 2) for key, value in zip(NUTRIENT_KEYS, values)}
+
+def calculate_nutrition_batch(recipe_ids, db: Session, scale_all=False):
+    """
+    Computes calorie/protein/fat/carb totals for many recipes with a single
+    aggregate over their ingredients' food matches and gram weights.
+    Returns {recipe_id: {"calories", "protein", "fat", "carbs"}} for every
+    recipe that has at least one ingredient.
+    """
+    recipe_ids = list(set(recipe_ids))
+    if not recipe_ids:
+        return {}
+    prepare_recipe_ingredients(recipe_ids, db)
+    totals = nutrition_totals_query(db).filter(models.RecipeIngredient.recipe_id.in_(recipe_ids)).all()
+    return {
+        recipe_id: scale_nutrition(raw_totals, scale_all)
+        for recipe_id, *raw_totals in totals
+    }
+
+def refresh_recipe_nutrition(recipe, db: Session):
+    """
+    Recomputes the stored totals of one recipe inside the caller's transaction.
+    Totals go through custom_scale, so they are re-summed rather than patched.
+    """
+    totals = calculate_nutrition_batch([recipe.recipe_id], db, scale_all=True).get(recipe.recipe_id)
+    for key in NUTRIENT_KEYS:
+        setattr(recipe, key, totals[key] if totals else None)
@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination for the recipe listings.
+
+Listings are ordered by a sort key DESC NULLS LAST and then by id DESC. A
+cursor is the (sort key, id) of the last row a client has seen, base64-encoded
+so it stays opaque. The next page seeks past it with a row comparison, which a
+matching composite index serves directly, so page 1000 costs the same as
+page 1. Rows with a NULL sort key come last, in a second seek on id alone.
+
+Offset paging is still supported: without a cursor the page starts at `skip`.
+Either way the response gets a next_cursor for the following page.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_value, row_id) -> str:
+    payload = {"k": sort_value.isoformat() if sort_value is not None else None, "id": row_id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Returns (sort_value, row_id); a malformed cursor is a 400."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        sort_value = datetime.fromisoformat(payload["k"]) if payload["k"] is not None else None
+        return sort_value, int(payload["id"])
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(query, sort_column, id_column, limit, cursor=None, skip=0):
+    """
+    Returns (items, next_cursor) for one page of `query`, ordered by
+    sort_column DESC NULLS LAST, id_column DESC.
+    """
+    keyed = query.add_columns(sort_column, id_column)
+
+    def fetch(q, count):
+        return q.order_by(sort_column.desc().nullslast(), id_column.desc()).limit(count).all()
+
+    if cursor is None:
+        rows = keyed.order_by(sort_column.desc().nullslast(), id_column.desc()).offset(skip).limit(limit + 1).all()
+    else:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is not None:
+            rows = fetch(keyed.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id)), limit + 1)
+            if len(rows) <= limit:
+                rows += fetch(keyed.filter(sort_column.is_(None)), limit + 1 - len(rows))
+        else:
+            rows = fetch(keyed.filter(sort_column.is_(None), id_column < row_id), limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+    return [row[0] for row in rows], next_cursor
@@ -0,0 +1,97 @@
+"""
+The recipe page bundle served by /recipes/{id}/full: the recipe with its
+source and creator, ingredients, ordered steps, tags, nutrition and a review
+summary.
+
+A bundle is the same for every caller, so it is cached as a unit for
+BUNDLE_TTL_SECONDS. The catalog hooks drop a recipe's bundle when the recipe,
+its reviews or anything else it shows is written. Building one costs five
+queries: the recipe with source and creator joined, a selectin query each for
+steps, tags and ingredients, and one grouped query over the reviews.
+"""
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+import models
+import nutrition_calculator
+import versioning
+from cache import LRUCache
+from recipe_cards import recipe_fields
+
+BUNDLE_TTL_SECONDS = 300
+BUNDLE_CACHE = LRUCache(maxsize=1024, ttl=BUNDLE_TTL_SECONDS)
+
+BUNDLE_OPTIONS = (
+    joinedload(models.Recipe.source),
+    joinedload(models.Recipe.creator),
+    selectinload(models.Recipe.steps),
+    selectinload(models.Recipe.tags_association).joinedload(models.RecipeTag.tag),
+    selectinload(models.Recipe.ingredients_association).joinedload(models.RecipeIngredient.ingredient),
+)
+
+
+def review_summary(db: Session, recipe_id: int) -> dict:
+    rating_counts = dict(
+        db.query(models.Review.rating, func.count(models.Review.id))
+        .filter(models.Review.recipe_id == recipe_id)
+        .group_by(models.Review.rating)
+        .all()
+    )
+    rated = {rating: count for rating, count in rating_counts.items() if rating is not None}
+    rated_count = sum(rated.values())
+    return {
+        "count": sum(rating_counts.values()),
+        "rated_count": rated_count,
+        "average_rating": round(sum(rating * count for rating, count in rated.items()) / rated_count, 2) if rated_count else None,
+        "rating_counts": {str(rating): rated.get(rating, 0) for rating in range(1, 6)},
+    }
+
+
+def build_recipe_bundle(db: Session, recipe_id: int) -> Optional[dict]:
+    recipe = db.query(models.Recipe).options(*BUNDLE_OPTIONS).filter(models.Recipe.recipe_id == recipe_id).first()
+    if recipe is None:
+        return None
+
+    # Same lazy fill as /recipes/{id}/nutrition, so the page never has to ask twice.
+    nutrition_missing = any(getattr(recipe, key) is None for key in nutrition_calculator.NUTRIENT_KEYS)
+    if nutrition_missing and recipe.ingredients_association:
+        nutrition_calculator.refresh_recipe_nutrition(recipe, db)
+        versioning.bump_recipes(db, [recipe_id])
+
+    bundle = {
+        "recipe": recipe_fields(recipe),
+        "ingredients": [{"name": ri.ingredient.name, "quantity": ri.quantity} for ri in recipe.ingredients_association],
+        "steps": [
+            {"recipe_id": step.recipe_id, "step_number": step.step_number, "step_detail": step.step_detail}
+            for step in sorted(recipe.steps, key=lambda step: step.step_number)
+        ],
+        "tags": [{"tag_id": rt.tag.tag_id, "tag_name": rt.tag.tag_name} for rt in recipe.tags_association],
+        "nutrition": None,
+        "reviews": review_summary(db, recipe_id),
+    }
+    if all(getattr(recipe, key) is not None for key in nutrition_calculator.NUTRIENT_KEYS):
+        bundle["nutrition"] = {key: getattr(recipe, key) for key in nutrition_calculator.NUTRIENT_KEYS}
+
+    if nutrition_missing:
+        db.commit()
+    return bundle
+
+
+def get_recipe_bundle(db: Session, recipe_id: int) -> Optional[dict]:
+    bundle = BUNDLE_CACHE.get(recipe_id)
+    if bundle is None:
+        bundle = build_recipe_bundle(db, recipe_id)
+        if bundle is not None:
+            BUNDLE_CACHE.put(recipe_id, bundle)
+    return bundle
+
+
+def invalidate(recipe_ids=None):
+    """Drops the cached bundles of the given recipes, or all of them."""
+    if recipe_ids is None:
+        BUNDLE_CACHE.clear()
+        return
+    for recipe_id in recipe_ids:
+        BUNDLE_CACHE.pop(recipe_id)
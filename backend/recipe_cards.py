@@ -0,0 +1,46 @@
+"""
+Recipe cards: what the list endpoints return for each recipe on a page.
+
+CARD_OPTIONS eager-loads everything a card shows, so a page costs one query
+for the recipes plus one each for their tags and ingredients, however many
+recipes it has. Creator and source come joined into the first query.
+recipe_card() then turns a loaded recipe into a plain dict without touching
+the database again.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+import image_variants
+import models
+
+CARD_OPTIONS = (
+    joinedload(models.Recipe.source),
+    joinedload(models.Recipe.creator),
+    selectinload(models.Recipe.tags_association).joinedload(models.RecipeTag.tag),
+    selectinload(models.Recipe.ingredients_association).joinedload(models.RecipeIngredient.ingredient),
+)
+
+CARD_COLUMNS = (
+    "recipe_id", "title", "description", "num_of_people", "image_url", "url", "date",
+    "source_id", "user_id", "calories", "protein", "fat", "carbs", "version",
+)
+
+
+def recipe_fields(recipe: models.Recipe) -> dict:
+    """The recipe's own columns plus its source and creator; needs both loaded."""
+    fields = {column: getattr(recipe, column) for column in CARD_COLUMNS}
+    fields["source"] = {"source_id": recipe.source.source_id, "source_name": recipe.source.source_name} if recipe.source else None
+    fields["creator"] = {"id": recipe.creator.id, "username": recipe.creator.username} if recipe.creator else None
+    fields["creator_username"] = recipe.creator.username if recipe.creator else "Deleted user"
+    fields["image_variants"] = image_variants.variant_urls(recipe.image_url)
+    return fields
+
+
+def recipe_card(recipe: models.Recipe) -> dict:
+    card = recipe_fields(recipe)
+    card["tags"] = [rt.tag.tag_name for rt in recipe.tags_association]
+    card["ingredients"] = [{"name": ri.ingredient.name, "quantity": ri.quantity} for ri in recipe.ingredients_association]
+    return card
+
+
+def recipe_cards(recipes) -> list:
+    return [recipe_card(recipe) for recipe in recipes]
@@ -0,0 +1,79 @@
+"""
+total_count strategies for the recipe listings, including a user's created
+and saved recipes.
+
+    exact     COUNT(*) of the filtered query, cached per normalised filter
+              signature for COUNT_TTL_SECONDS and dropped on any recipe write
+    estimate  the planner's row estimate: pg_class.reltuples for the unfiltered
+              listing, EXPLAIN for a filtered one; no rows are counted
+    none      no count at all; clients page on has_more / next_cursor
+
+Clients pick the mode per request with ?count=.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from cache import LRUCache
+
+COUNT_MODES = ("exact", "estimate", "none")
+COUNT_TTL_SECONDS = 30
+COUNT_CACHE = LRUCache(maxsize=2048, ttl=COUNT_TTL_SECONDS)
+
+
+def filter_signature(**filters):
+    """A hashable key that is the same for equivalent filters, e.g. tags given in another order."""
+    signature = []
+    for name, value in sorted(filters.items()):
+        if value is None or value == [] or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(set(value)))
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        signature.append((name, value))
+    return tuple(signature)
+
+
+def exact_count(query, signature):
+    count = COUNT_CACHE.get(signature)
+    if count is None:
+        count = query.order_by(None).count()
+        COUNT_CACHE.put(signature, count)
+    return count
+
+
+def estimated_count(db: Session, query, signature):
+    if not signature:
+        reltuples = db.execute(text("SELECT reltuples FROM pg_class WHERE oid = 'recipes'::regclass")).scalar()
+        # -1 until the table has been vacuumed or analyzed once.
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+        return exact_count(query, signature)
+
+    statement = query.order_by(None).statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+    )
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", statement.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def total_count(db: Session, query, mode, signature):
+    """The total_count to report for `query` under the given mode (None for "none")."""
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        return estimated_count(db, query, signature)
+    return exact_count(query, signature)
+
+
+def invalidate(signature=None):
+    """Drops one cached count, e.g. a user's saved recipes after a save, or all of them."""
+    if signature is None:
+        COUNT_CACHE.clear()
+    else:
+        COUNT_CACHE.pop(signature)
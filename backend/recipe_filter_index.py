@@ -0,0 +1,141 @@
+"""
+In-memory index for the tag/ingredient include and exclude filters of
+/recipes/search/.
+
+For every tag name and ingredient name the index keeps the sorted array of
+recipe ids that use it. Includes are answered by intersecting those arrays
+(smallest first), excludes by removing their union, so a search with many
+filters costs a few NumPy operations instead of a many-way join. The surviving
+ids are handed back to the database as a single IN / NOT IN clause, and the
+database still does the ordering, paging and hydration.
+
+The index is built lazily on the first filtered search. Routes that write
+recipes keep it current with refresh_recipes(), remove_recipes() and
+invalidate(); the backend runs as a single process, so in-process updates are
+enough.
+"""
+from threading import Lock
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+
+ID_DTYPE = np.int64
+EMPTY_IDS = np.empty(0, dtype=ID_DTYPE)
+
+
+def _group_ids(rows):
+    """{name: sorted unique id array} from (recipe_id, name) rows."""
+    grouped = {}
+    for recipe_id, name in rows:
+        grouped.setdefault(name, []).append(recipe_id)
+    return {name: np.unique(np.asarray(ids, dtype=ID_DTYPE)) for name, ids in grouped.items()}
+
+
+class RecipeFilterIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._built = False
+        self._all_ids = EMPTY_IDS
+        self._postings = {"tag": {}, "ingredient": {}}
+
+    @staticmethod
+    def _rows(db: Session, recipe_ids=None):
+        tag_query = db.query(models.RecipeTag.recipe_id, models.Tag.tag_name)\
+            .join(models.Tag, models.Tag.tag_id == models.RecipeTag.tag_id)
+        ingredient_query = db.query(models.RecipeIngredient.recipe_id, models.Ingredient.name)\
+            .join(models.Ingredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)
+        recipe_query = db.query(models.Recipe.recipe_id)
+        if recipe_ids is not None:
+            tag_query = tag_query.filter(models.RecipeTag.recipe_id.in_(recipe_ids))
+            ingredient_query = ingredient_query.filter(models.RecipeIngredient.recipe_id.in_(recipe_ids))
+            recipe_query = recipe_query.filter(models.Recipe.recipe_id.in_(recipe_ids))
+        return (
+            np.asarray([recipe_id for (recipe_id,) in recipe_query], dtype=ID_DTYPE),
+            {"tag": _group_ids(tag_query), "ingredient": _group_ids(ingredient_query)},
+        )
+
+    def _build(self, db: Session):
+        all_ids, postings = self._rows(db)
+        self._all_ids = np.unique(all_ids)
+        self._postings = postings
+        self._built = True
+
+    def _remove(self, recipe_ids):
+        self._all_ids = np.setdiff1d(self._all_ids, recipe_ids, assume_unique=True)
+        for postings in self._postings.values():
+            for name in list(postings):
+                ids = postings[name]
+                positions = np.searchsorted(ids, recipe_ids)
+                hits = positions[(positions < len(ids)) & (ids[np.minimum(positions, len(ids) - 1)] == recipe_ids)]
+                if len(hits):
+                    ids = np.delete(ids, hits)
+                    if len(ids):
+                        postings[name] = ids
+                    else:
+                        del postings[name]
+
+    def refresh_recipes(self, db: Session, recipe_ids):
+        """Re-reads the tags and ingredients of recipes that were created or edited."""
+        recipe_ids = np.unique(np.asarray(list(recipe_ids), dtype=ID_DTYPE))
+        with self._lock:
+            if not self._built or not len(recipe_ids):
+                return
+            all_ids, postings = self._rows(db, recipe_ids.tolist())
+            self._remove(recipe_ids)
+            self._all_ids = np.union1d(self._all_ids, all_ids)
+            for kind, names in postings.items():
+                for name, ids in names.items():
+                    self._postings[kind][name] = np.union1d(self._postings[kind].get(name, EMPTY_IDS), ids)
+
+    def remove_recipes(self, recipe_ids):
+        recipe_ids = np.unique(np.asarray(list(recipe_ids), dtype=ID_DTYPE))
+        with self._lock:
+            if self._built and len(recipe_ids):
+                self._remove(recipe_ids)
+
+    def invalidate(self):
+        """Drops everything; the next filtered search rebuilds from the database."""
+        with self._lock:
+            self._built = False
+            self._all_ids = EMPTY_IDS
+            self._postings = {"tag": {}, "ingredient": {}}
+
+    def matching_ids(self, db: Session, tag_inc=None, tag_exc=None, ing_inc=None, ing_exc=None):
+        """Sorted ids of recipes that have every included and none of the excluded tags/ingredients."""
+        with self._lock:
+            if not self._built:
+                self._build(db)
+
+            includes = [self._postings["tag"].get(name, EMPTY_IDS) for name in tag_inc or []]
+            includes += [self._postings["ingredient"].get(name, EMPTY_IDS) for name in ing_inc or []]
+            excludes = [self._postings["tag"].get(name, EMPTY_IDS) for name in tag_exc or []]
+            excludes += [self._postings["ingredient"].get(name, EMPTY_IDS) for name in ing_exc or []]
+
+            if includes:
+                includes.sort(key=len)
+                result = includes[0]
+                for ids in includes[1:]:
+                    if not len(result):
+                        break
+                    result = np.intersect1d(result, ids, assume_unique=True)
+            else:
+                result = self._all_ids
+            if excludes and len(result):
+                result = result[~np.isin(result, np.concatenate(excludes))]
+            return result, self._all_ids
+
+    def id_filter(self, db: Session, tag_inc=None, tag_exc=None, ing_inc=None, ing_exc=None):
+        """
+        A filter clause on Recipe.recipe_id for the given includes/excludes. It is
+        written as NOT IN over the complement when that list is shorter, which is
+        the usual case for exclude-only searches.
+        """
+        ids, all_ids = self.matching_ids(db, tag_inc, tag_exc, ing_inc, ing_exc)
+        if len(ids) * 2 > len(all_ids):
+            return models.Recipe.recipe_id.not_in(np.setdiff1d(all_ids, ids, assume_unique=True).tolist())
+        return models.Recipe.recipe_id.in_(ids.tolist())
+
+
+RECIPE_FILTER_INDEX = RecipeFilterIndex()
@@ -0,0 +1,196 @@
+"""
+Bulk loader behind /recipes/import_recipes/.
+
+Recipes are loaded in chunks of CHUNK_SIZE, one transaction per chunk:
+
+    - name -> id maps for sources, ingredients and tags are read once up front,
+      so names that already exist cost no queries at all;
+    - names first seen in a chunk are inserted together with
+      INSERT ... ON CONFLICT DO NOTHING RETURNING, in order of first appearance;
+    - recipe ids are drawn from their sequence in one query, and recipes,
+      steps, recipe_ingredients and recipe_tags go in as multi-row INSERTs.
+
+Names are matched exactly, duplicate ingredients and tags within a recipe are
+skipped and step numbers keep their line positions, so the rows and ids that
+come out are the same as when the file was loaded one recipe at a time.
+Records without the fields a recipe needs are skipped and reported instead of
+failing their chunk.
+
+Imports run as background jobs (import_jobs), which follow and steer them
+through the on_chunk callback.
+"""
+from itertools import islice
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+import catalog
+import models
+import nutrition_calculator
+import recipe_names
+import recipe_search
+import versioning
+
+CHUNK_SIZE = 500
+REQUIRED_FIELDS = ("title", "image", "url", "ingredients")
+IMPORTED_TABLES = ["reviews", "recipe_tags", "steps", "recipe_ingredients", "meal_plan_recipes", "ingredients", "tags", "recipes", "sources"]
+SERIAL_COLUMNS = {"reviews": "id", "recipes": "recipe_id", "ingredients": "ingredient_id", "tags": "tag_id", "sources": "source_id"}
+
+
+def delete_existing_recipes(db: Session):
+    """Empties the recipe tables and restarts their ids, for a fresh import."""
+    for table in IMPORTED_TABLES:
+        result = db.execute(text(f"SELECT EXISTS (SELECT FROM pg_tables WHERE tablename = '{table}')")).scalar()
+        if result:
+            db.execute(text(f"DELETE FROM {table}"))
+            if table in SERIAL_COLUMNS:
+                db.execute(text(f"ALTER SEQUENCE {table}_{SERIAL_COLUMNS[table]}_seq RESTART WITH 1"))
+    versioning.bump_catalog(db)
+    db.commit()
+    catalog.catalog_reset()
+
+
+def name_map(db: Session, id_column, name_column) -> dict:
+    return {name: row_id for row_id, name in db.query(id_column, name_column)}
+
+
+def recipe_error(recipe):
+    """Why a record cannot be imported, or None."""
+    if not isinstance(recipe, dict):
+        return "not a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if field not in recipe]
+    if missing:
+        return "missing " + ", ".join(missing)
+    if not isinstance(recipe["ingredients"], list):
+        return "ingredients is not a list"
+    return None
+
+
+def recipe_lines(recipe):
+    """(ingredient lines, tag names, steps) of one recipe as the importer has always read them."""
+    ingredients = {}
+    for ingredient_data in recipe["ingredients"]:
+        if not ingredient_data or len(ingredient_data) < 1:
+            continue
+        ingredients.setdefault(ingredient_data[0], ingredient_data[1] if len(ingredient_data) > 1 else None)
+
+    tags = list(dict.fromkeys(recipe.get("tags", []) or []))
+
+    steps = [
+        (i, step_detail.strip())
+        for i, step_detail in enumerate(recipe.get("step-detail", "").split("\n"), start=1)
+        if step_detail.strip()
+    ]
+    return ingredients, tags, steps
+
+
+def new_names(names, known):
+    """Names not in `known`, once each, in order of first appearance."""
+    return [name for name in dict.fromkeys(names) if name not in known]
+
+
+def import_chunk(db: Session, recipes, maps) -> list:
+    """Loads one chunk of recipes in the current transaction and returns their ids."""
+    lines = [recipe_lines(recipe) for recipe in recipes]
+    source_names = [recipe.get("source", "Unknown") for recipe in recipes]
+
+    maps["sources"].update(recipe_names.insert_names(
+        db, models.Source, models.Source.source_id, models.Source.source_name,
+        new_names(source_names, maps["sources"])
+    ))
+    ingredient_names = new_names((name for ingredients, _, _ in lines for name in ingredients), maps["ingredients"])
+    matches = nutrition_calculator.resolve_ingredients(ingredient_names, db)
+    maps["ingredients"].update(recipe_names.insert_names(
+        db, models.Ingredient, models.Ingredient.ingredient_id, models.Ingredient.name, ingredient_names,
+        columns=lambda name: nutrition_calculator.food_columns(matches[name][0], matches[name][1], db)
+    ))
+    maps["tags"].update(recipe_names.insert_names(
+        db, models.Tag, models.Tag.tag_id, models.Tag.tag_name,
+        new_names((name for _, tags, _ in lines for name in tags), maps["tags"])
+    ))
+
+    recipe_ids = [
+        recipe_id for (recipe_id,) in db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('recipes', 'recipe_id')) FROM generate_series(1, :n)"),
+            {"n": len(recipes)}
+        )
+    ]
+    db.execute(insert(models.Recipe.__table__), [
+        {
+            "recipe_id": recipe_id,
+            "title": recipe["title"],
+            "description": recipe.get("description"),
+            "num_of_people": recipe.get("num_of_people"),
+            "date": recipe.get("date"),
+            "image_url": recipe["image"],
+            "url": recipe["url"],
+            "source_id": maps["sources"][source_name],
+        }
+        for recipe_id, recipe, source_name in zip(recipe_ids, recipes, source_names)
+    ])
+
+    recipe_ingredients, recipe_tags, steps = [], [], []
+    for recipe_id, (ingredients, tags, recipe_steps) in zip(recipe_ids, lines):
+        recipe_ingredients += [
+            {
+                "recipe_id": recipe_id,
+                "ingredient_id": maps["ingredients"][name],
+                **nutrition_calculator.quantity_columns(quantity),
+            }
+            for name, quantity in ingredients.items()
+        ]
+        recipe_tags += [{"recipe_id": recipe_id, "tag_id": maps["tags"][name]} for name in tags]
+        steps += [
+            {"recipe_id": recipe_id, "step_number": step_number, "step_detail": step_detail}
+            for step_number, step_detail in recipe_steps
+        ]
+    # Core inserts on the tables: the ORM bulk path leaves out None values,
+    # which splits the rows into many small batches.
+    for model, rows in ((models.RecipeIngredient, recipe_ingredients), (models.RecipeTag, recipe_tags), (models.Step, steps)):
+        if rows:
+            db.execute(insert(model.__table__), rows)
+
+    recipe_search.refresh_search_vectors(db, recipe_ids)
+    return recipe_ids
+
+
+def import_recipes(db: Session, recipes, chunk_size=CHUNK_SIZE, start=0, on_chunk=None) -> int:
+    """
+    Loads an iterable of recipe dicts chunk by chunk, skipping the first
+    `start` records; returns how many were imported. on_chunk(db, records,
+    errors) runs in each chunk's transaction just before its commit, so
+    raising from it rolls the chunk back.
+    """
+    maps = {
+        "sources": name_map(db, models.Source.source_id, models.Source.source_name),
+        "ingredients": name_map(db, models.Ingredient.ingredient_id, models.Ingredient.name),
+        "tags": name_map(db, models.Tag.tag_id, models.Tag.tag_name),
+    }
+    recipes = islice(recipes, start, None)
+    position = start
+    imported = 0
+    while True:
+        chunk = list(islice(recipes, chunk_size))
+        if not chunk:
+            break
+        valid, errors = [], []
+        for index, recipe in enumerate(chunk, start=position):
+            error = recipe_error(recipe)
+            if error:
+                errors.append(f"Recipe {index}: {error}")
+            else:
+                valid.append(recipe)
+
+        recipe_ids = import_chunk(db, valid, maps) if valid else []
+        if on_chunk:
+            on_chunk(db, len(chunk), errors)
+        # Last, so the catalog_versions row is locked only for the commit,
+        # not while the chunk is inserted.
+        if recipe_ids:
+            versioning.bump_recipes(db, recipe_ids, catalog=True)
+        db.commit()
+        if recipe_ids:
+            catalog.recipes_changed(db, recipe_ids)
+        imported += len(recipe_ids)
+        position += len(chunk)
+    return imported
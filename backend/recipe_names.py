@@ -0,0 +1,76 @@
+"""
+Tag and ingredient names to ids for the recipe write paths, a whole recipe's
+worth at a time.
+
+    tag_ids(db, names)         {name: tag_id}, adding tags that do not exist yet
+    ingredient_ids(db, names)  {name: ingredient_id}, the same for ingredients
+
+Names are matched case-insensitively in one query on the lower() indexes of
+tags and ingredients. Where imported data holds several spellings of a name,
+the all-lowercase one wins, then the oldest. Missing names are inserted with
+one INSERT ... ON CONFLICT DO NOTHING, so two writers adding the same name at
+once end up sharing its row instead of failing.
+"""
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+import models
+import nutrition_calculator
+
+
+def insert_names(db: Session, model, id_column, name_column, names, columns=None) -> dict:
+    """
+    Inserts new names in the given order and returns {name: id}. A name another
+    writer added in the meantime is skipped by ON CONFLICT and read back instead.
+    """
+    if not names:
+        return {}
+    rows = [{name_column.key: name, **(columns(name) if columns else {})} for name in names]
+    statement = pg_insert(model).values(rows)\
+        .on_conflict_do_nothing(index_elements=[name_column])\
+        .returning(id_column, name_column)
+    ids = {name: row_id for row_id, name in db.execute(statement)}
+    raced = [name for name in names if name not in ids]
+    if raced:
+        ids.update((name, row_id) for row_id, name in db.query(id_column, name_column).filter(name_column.in_(raced)))
+    return ids
+
+
+def lookup_names(db: Session, id_column, name_column, keys) -> dict:
+    """{lowercased name: id} for the keys that exist, in one query."""
+    if not keys:
+        return {}
+    lower_name = func.lower(name_column)
+    rows = db.query(lower_name, id_column)\
+        .filter(lower_name.in_(keys))\
+        .distinct(lower_name)\
+        .order_by(lower_name, name_column != lower_name, id_column)
+    return dict(rows)
+
+
+def tag_ids(db: Session, names) -> dict:
+    keys = {name: name.lower() for name in names}
+    ids = lookup_names(db, models.Tag.tag_id, models.Tag.tag_name, set(keys.values()))
+    # New tags keep the spelling they were first given in.
+    missing = {}
+    for name, key in keys.items():
+        if key not in ids:
+            missing.setdefault(key, name)
+    inserted = insert_names(db, models.Tag, models.Tag.tag_id, models.Tag.tag_name, list(missing.values()))
+    ids.update((key, inserted[name]) for key, name in missing.items())
+    return {name: ids[key] for name, key in keys.items()}
+
+
+def ingredient_ids(db: Session, names) -> dict:
+    keys = {name: name.lower() for name in names}
+    ids = lookup_names(db, models.Ingredient.ingredient_id, models.Ingredient.name, set(keys.values()))
+    # New ingredients are stored lowercased, matched to a food like imported ones.
+    missing = list(dict.fromkeys(key for key in keys.values() if key not in ids))
+    if missing:
+        matches = nutrition_calculator.resolve_ingredients(missing, db)
+        ids.update(insert_names(
+            db, models.Ingredient, models.Ingredient.ingredient_id, models.Ingredient.name, missing,
+            columns=lambda name: nutrition_calculator.food_columns(matches[name][0], matches[name][1], db)
+        ))
+    return {name: ids[key] for name, key in keys.items()}
@@ -0,0 +1,121 @@
+"""
+Full-text search over recipes.
+
+Every recipe carries a weighted tsvector in recipes.search_vector: the title
+weighs most (A), then ingredient names (B), then the description (C). The text
+is normalised in Python before it reaches Postgres: punctuation and the
+stopwords of utils.preprocess_vietnamese are dropped and diacritics are folded,
+so "Gà rán" and "ga ran" hit the same lexemes without the unaccent extension.
+Queries go through the same normalisation and use the GIN index on the column.
+
+Typeahead suggestions use recipes.search_title instead, the folded title with
+every word kept, behind a pg_trgm GIN index so misspelt prefixes still match.
+
+Both columns are maintained by the application: call refresh_search_vectors()
+after writing a recipe's title, description or ingredients.
+"""
+import re
+import unicodedata
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+import models
+from utils import fold_vietnamese, preprocess_vietnamese
+
+TS_CONFIG = "simple"
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def normalize_search_text(value) -> str:
+    """The form both documents and queries are indexed in: folded, without stopwords or punctuation."""
+    if not value:
+        return ""
+    value = re.sub(r"[^\w\s]|_", " ", unicodedata.normalize("NFC", value))
+    return fold_vietnamese(preprocess_vietnamese(value))
+
+
+def normalize_title(value) -> str:
+    """Folded title for trigram matching; unlike normalize_search_text it keeps stopwords."""
+    if not value:
+        return ""
+    value = re.sub(r"[^\w\s]|_", " ", unicodedata.normalize("NFC", value))
+    return " ".join(fold_vietnamese(value).split())
+
+
+def refresh_search_vectors(db: Session, recipe_ids=None, batch_size=1000):
+    """Recomputes the search columns of the given recipes, or of every recipe when recipe_ids is None."""
+    db.flush()
+    query = db.query(models.Recipe.recipe_id, models.Recipe.title, models.Recipe.description)
+    if recipe_ids is not None:
+        recipe_ids = list(set(recipe_ids))
+        if not recipe_ids:
+            return
+        query = query.filter(models.Recipe.recipe_id.in_(recipe_ids))
+    recipes = query.order_by(models.Recipe.recipe_id).all()
+
+    for i in range(0, len(recipes), batch_size):
+        batch = recipes[i:i + batch_size]
+        ingredient_names = {}
+        for recipe_id, name in db.query(models.RecipeIngredient.recipe_id, models.Ingredient.name)\
+                .join(models.Ingredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)\
+                .filter(models.RecipeIngredient.recipe_id.in_([recipe.recipe_id for recipe in batch])):
+            ingredient_names.setdefault(recipe_id, []).append(name)
+
+        db.execute(text(
+            "UPDATE recipes AS r SET search_title = v.search_title, search_vector = "
+            "setweight(to_tsvector(CAST(:config AS regconfig), v.title), 'A') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), v.ingredients), 'B') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), v.description), 'C') "
+            "FROM unnest(CAST(:recipe_id AS INTEGER[]), CAST(:search_title AS TEXT[]), CAST(:title AS TEXT[]), "
+            "CAST(:ingredients AS TEXT[]), CAST(:description AS TEXT[])) "
+            "AS v(recipe_id, search_title, title, ingredients, description) "
+            "WHERE r.recipe_id = v.recipe_id"
+        ), {
+            "config": TS_CONFIG,
+            "recipe_id": [recipe.recipe_id for recipe in batch],
+            "search_title": [normalize_title(recipe.title) for recipe in batch],
+            "title": [normalize_search_text(recipe.title) for recipe in batch],
+            "ingredients": [normalize_search_text(" ".join(ingredient_names.get(recipe.recipe_id, []))) for recipe in batch],
+            "description": [normalize_search_text(recipe.description) for recipe in batch],
+        })
+
+
+def build_tsquery(query_text):
+    """
+    Turns user input into a to_tsquery() string where every word must match and
+    the last one may be a prefix. Returns None when nothing searchable is left.
+    """
+    tokens = TOKEN_PATTERN.findall(normalize_search_text(query_text))
+    if not tokens:
+        return None
+    return " & ".join(tokens[:-1] + [tokens[-1] + ":*"])
+
+
+def apply_search(query, query_text):
+    """
+    Filters a Recipe query to full-text matches. Returns the filtered query and
+    a relevance expression to order by, or (query, None) if query_text has no
+    searchable words.
+    """
+    tsquery_text = build_tsquery(query_text)
+    if tsquery_text is None:
+        return query, None
+    tsquery = func.to_tsquery(TS_CONFIG, tsquery_text)
+    rank = func.ts_rank_cd(models.Recipe.search_vector, tsquery)
+    return query.filter(models.Recipe.search_vector.op("@@")(tsquery)), rank
+
+
+def suggest_titles(db: Session, query_text, limit=8):
+    """
+    Recipes whose folded title contains something close to query_text, best
+    first. `%>` is pg_trgm's word-similarity match, which the GIN index serves.
+    """
+    needle = normalize_title(query_text)
+    if not needle:
+        return []
+    score = func.word_similarity(needle, models.Recipe.search_title)
+    return db.query(models.Recipe.recipe_id, models.Recipe.title, models.Recipe.image_url)\
+        .filter(models.Recipe.search_title.op("%>")(needle))\
+        .order_by(score.desc(), func.similarity(needle, models.Recipe.search_title).desc(), models.Recipe.recipe_id)\
+        .limit(limit).all()
@@ -6,6 +6,9 @@ from datetime import datetime
 import models
 import schemas
 import auth
+import nutrition_calculator
+import catalog
+import versioning
 from database import get_db
 
 router = APIRouter(
@@ -32,7 +35,9 @@ def admin_delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     
     db.delete(recipe)
+    versioning.bump_catalog(db)
     db.commit()
+    catalog.recipes_removed([recipe_id])
 
 @router.delete("/reviews/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
 def admin_delete_review(review_id: int, db: Session = Depends(get_db)):
@@ -40,8 +45,11 @@ def admin_delete_review(review_id: int, db: Session = Depends(get_db)):
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
         
+    recipe_id = review.recipe_id
     db.delete(review)
+    versioning.bump_recipes(db, [recipe_id])
     db.commit()
+    catalog.recipe_details_changed([recipe_id])
 
 @router.get("/dashboard/users", response_model=List[schemas.UserAdminView])
 def get_users_for_admin_dashboard(
@@ -93,8 +101,13 @@ def delete_user_by_admin(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
+    # Their recipes stay, but now show "Deleted user" as the creator.
+    versioning.bump_recipes(db, [
+        recipe_id for (recipe_id,) in db.query(models.Recipe.recipe_id).filter(models.Recipe.user_id == user_id)
+    ], catalog=True)
     db.delete(user)
     db.commit()
+    catalog.recipe_details_changed()
 
 @router.get("/charts/recipes-by-date")
 def get_recipes_by_date_chart(db: Session = Depends(get_db)):
@@ -115,4 +128,72 @@ def get_reviews_by_date_chart(db: Session = Depends(get_db), start_date: Optiona
         query = query.filter(models.Review.created_at <= end_date)
     
     data = query.group_by(func.date(models.Review.created_at)).all()
-    return {str(date): count for date, count in data}
\ No newline at end of file
+    return {str(date): count for date, count in data}
+
+@router.get("/nutrition-cache/stats")
+def get_nutrition_cache_stats():
+    """Hit/miss counters of the ingredient-to-nutrition match cache in this worker."""
+    return nutrition_calculator.match_cache_stats()
+
+@router.get("/foods", response_model=List[schemas.FoodNutrition])
+def get_foods(db: Session = Depends(get_db)):
+    """All rows of the nutrition table that ingredients can be matched to."""
+    return db.query(models.FoodNutrition).order_by(models.FoodNutrition.name).all()
+
+@router.get("/ingredients/food-matches", response_model=List[schemas.IngredientFoodMatch])
+def get_ingredient_food_matches(
+    db: Session = Depends(get_db),
+    max_score: float = Query(90, description="Only list automatic matches scoring below this."),
+    include_manual: bool = False,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Ingredients whose nutrition match is low-confidence, most used first."""
+    query = db.query(
+        models.Ingredient,
+        models.FoodNutrition.name,
+        func.count(models.RecipeIngredient.recipe_id).label("recipe_count")
+    ).outerjoin(models.FoodNutrition, models.FoodNutrition.food_id == models.Ingredient.food_id)\
+     .outerjoin(models.RecipeIngredient, models.RecipeIngredient.ingredient_id == models.Ingredient.ingredient_id)\
+     .filter(models.Ingredient.match_score < max_score)\
+     .group_by(models.Ingredient.ingredient_id, models.FoodNutrition.name)
+
+    if not include_manual:
+        query = query.filter(models.Ingredient.match_is_manual.is_(False))
+
+    rows = query.order_by(func.count(models.RecipeIngredient.recipe_id).desc(), models.Ingredient.match_score).limit(limit).all()
+    return [
+        {
+            "ingredient_id": ingredient.ingredient_id,
+            "name": ingredient.name,
+            "food_id": ingredient.food_id,
+            "food_name": food_name,
+            "match_score": ingredient.match_score,
+            "match_is_manual": ingredient.match_is_manual,
+            "recipe_count": recipe_count
+        }
+        for ingredient, food_name, recipe_count in rows
+    ]
+
+@router.put("/ingredients/{ingredient_id}/food", response_model=schemas.Ingredient)
+def override_ingredient_food(ingredient_id: int, override: schemas.IngredientFoodOverride, db: Session = Depends(get_db)):
+    """Pins an ingredient to a food (or to none) and clears nutrition of recipes using it."""
+    ingredient = db.query(models.Ingredient).filter(models.Ingredient.ingredient_id == ingredient_id).first()
+    if not ingredient:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingredient not found")
+    if override.food_id is not None and not db.query(models.FoodNutrition).filter(models.FoodNutrition.food_id == override.food_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Food not found")
+
+    ingredient.food_id = override.food_id
+    ingredient.match_score = 100.0
+    ingredient.match_is_manual = True
+
+    recipe_ids = db.query(models.RecipeIngredient.recipe_id).filter(models.RecipeIngredient.ingredient_id == ingredient_id)
+    db.query(models.Recipe).filter(models.Recipe.recipe_id.in_(recipe_ids.scalar_subquery())).update(
+        {models.Recipe.calories: None, models.Recipe.protein: None, models.Recipe.fat: None, models.Recipe.carbs: None},
+        synchronize_session=False
+    )
+    versioning.bump_recipes(db, [recipe_id for (recipe_id,) in recipe_ids], catalog=True)
+    db.commit()
+    catalog.recipe_details_changed()
+    db.refresh(ingredient)
+    return ingredient
\ No newline at end of file
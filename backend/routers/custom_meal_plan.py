@@ -6,16 +6,14 @@ import auth
 from database import get_db
 from schemas import RecipeResponse, UserProfile
 import nutrition_calculator
+import image_variants
+import versioning
 
 router = APIRouter(
     prefix="/custom-meal-plan",
     tags=["custom-meal-plan"]
 )
 
-def custom_scale(x, a=800, b=1500, x_min=500, x_max=3000):
-    return a + (x - x_min) * (b - a) / (x_max - x_min) if x > 1000 else x
-
-
 def calculate_calories(gender: str, weight: float, frequency_of_exercise: str) -> float:
     """
     Calculates the estimated daily calorie needs based on gender, weight, and exercise frequency.
@@ -93,32 +91,24 @@ def get_custom_meal_plan(
     recipes = db.query(models.Recipe).join(models.CustomMealPlan).filter(
         models.CustomMealPlan.user_id == current_user.id
     ).all()
-    for recipe in recipes:
-        if recipe.calories is None:
-            ingredients_with_quantity = db.query(models.Ingredient.name, models.RecipeIngredient.quantity)\
-                .join(models.RecipeIngredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)\
-                .filter(models.RecipeIngredient.recipe_id == recipe.recipe_id).all()
-            
-            if ingredients_with_quantity:
-                total_nutrition = {"calories": 0.0, "protein": 0.0, "fat": 0.0, "carbs": 0.0}
-                for name, quantity in ingredients_with_quantity:
-                    ingredient_pair = [name, quantity]
-                    calories, protein, fat, carbs = nutrition_calculator.calculate_nutrition(ingredient_pair)
-                    total_nutrition["calories"] += calories
-                    total_nutrition["protein"] += protein
-                    total_nutrition["fat"] += fat
-                    total_nutrition["carbs"] += carbs
-                
-                recipe.calories = round(custom_scale(total_nutrition["calories"]), 2)
-                recipe.protein = round(total_nutrition["protein"], 2)
-                recipe.fat = round(total_nutrition["fat"], 2)
-                recipe.carbs = round(total_nutrition["carbs"], 2)
+    missing = [recipe for recipe in recipes if recipe.calories is None]
+    if missing:
+        nutrition = nutrition_calculator.calculate_nutrition_batch([recipe.recipe_id for recipe in missing], db)
+        for recipe in missing:
+            totals = nutrition.get(recipe.recipe_id)
+            if totals is not None:
+                recipe.calories = totals["calories"]
+                recipe.protein = totals["protein"]
+                recipe.fat = totals["fat"]
+                recipe.carbs = totals["carbs"]
             else:
                 recipe.calories = 0.0
                 recipe.protein = 0.0
                 recipe.fat = 0.0
                 recipe.carbs = 0.0
+        versioning.bump_recipes(db, [recipe.recipe_id for recipe in missing])
 
+    image_variants.attach(recipes)
     db.commit()
     return recipes
 
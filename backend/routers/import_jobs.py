@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+import models
+import import_jobs
+from database import get_db
+
+router = APIRouter(
+    prefix="/import-jobs",
+    tags=["import_jobs"]
+)
+
+
+def get_job(db: Session, job_id: int) -> models.ImportJob:
+    job = db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+@router.get("/")
+def list_import_jobs(limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    """The most recent import jobs, newest first."""
+    jobs = db.query(models.ImportJob).order_by(models.ImportJob.id.desc()).limit(limit).all()
+    return [import_jobs.job_status(job) for job in jobs]
+
+
+@router.get("/{job_id}")
+def get_import_job(job_id: int, db: Session = Depends(get_db)):
+    """Status of an import job: records processed (and the total, once the file is read), records per second, ETA and errors."""
+    return import_jobs.job_status(get_job(db, job_id))
+
+
+@router.post("/{job_id}/cancel")
+def cancel_import_job(job_id: int, db: Session = Depends(get_db)):
+    """Stops a job at its next chunk boundary; the chunk in progress is rolled back."""
+    job = get_job(db, job_id)
+    if job.status not in import_jobs.ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Import job is already {job.status}")
+    import_jobs.request_cancel(db, job)
+    return import_jobs.job_status(job)
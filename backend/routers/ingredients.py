@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 
 import models
 import schemas
+import versioning
 from database import get_db
 
 router = APIRouter(
@@ -13,8 +14,12 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.IngredientWithCount])
-def get_ingredients(db: Session = Depends(get_db)):
+def get_ingredients(request: Request, response: Response, db: Session = Depends(get_db)):
     """Retrieve a list of all ingredients with their recipe counts, sorted alphabetically."""
+    not_modified = versioning.conditional(request, response, versioning.catalog_etag(versioning.catalog_version(db)))
+    if not_modified:
+        return not_modified
+
     ingredients_with_count = db.query(
         models.Ingredient,
         func.count(models.RecipeIngredient.recipe_id).label("recipe_count")
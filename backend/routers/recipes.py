@@ -1,44 +1,78 @@
 # backend/routers/recipes.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, exists, text
-from typing import List, Optional
+from sqlalchemy import insert
+from typing import List, Literal, Optional
 from pathlib import Path
 from datetime import datetime
-import uuid
-import os
-import json
 import models
 import schemas
-from database import get_db
+from database import SessionLocal, get_db
 import nutrition_calculator
+import recipe_names
+import recipe_search
+from recipe_filter_index import RECIPE_FILTER_INDEX
+from featured_recipes import FEATURED_POOL
+from pagination import paginate
+import catalog
+import recipe_counts
+from recipe_cards import CARD_OPTIONS, recipe_cards
+import recipe_bundle
+import image_upload
+import image_variants
+import moderation
+import import_jobs
+import versioning
 import auth
 
-UPLOAD_DIRECTORY = "/app/uploads"
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
-
-
 router = APIRouter(
     prefix="/recipes",
     tags=["recipes"]
 )
 
 
-@router.post("/upload-image/", status_code=status.HTTP_201_CREATED)
-async def upload_recipe_image(image: UploadFile = File(...)):
-    try:
-        file_extension = image.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(UPLOAD_DIRECTORY, unique_filename)
-
-        with open(file_path, "wb") as buffer:
-            buffer.write(await image.read())
+@router.post(
+    "/upload-image/",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"image": {"type": "string", "format": "binary"}},
+        "required": ["image"],
+    }}}}},
+)
+async def upload_recipe_image(request: Request):
+    """
+    Stores an image streamed as the `image` field of a multipart form. Returns
+    its URL together with the size and throughput of the upload; the resized
+    variants are built afterwards in a process pool.
+    """
+    uploaded = await image_upload.save_image(request)
+    image_url = uploaded["image_url"]
+    future = image_variants.submit(image_variants.original_filename(image_url))
+    future.add_done_callback(lambda future: image_variants_built(image_url, future))
+    return uploaded
 
-        image_url = f"http://localhost:8080/images/{unique_filename}"
-        return {"image_url": image_url}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+def image_variants_built(image_url: str, future):
+    """
+    Recipes saved with the image before its variants were ready get a new
+    version, so cached pages and ETags pick up the variant URLs.
+    """
+    if future.exception() is not None:
+        print(f"Could not build variants of {image_url}: {future.exception()!r}")
+        return
+    db = SessionLocal()
+    try:
+        recipe_ids = [
+            recipe_id for (recipe_id,) in
+            db.query(models.Recipe.recipe_id).filter(models.Recipe.image_url == image_url)
+        ]
+        if recipe_ids:
+            versioning.bump_recipes(db, recipe_ids, catalog=True)
+            db.commit()
+            catalog.recipe_details_changed(recipe_ids)
+    finally:
+        db.close()
 
 @router.get("/random-featured/")
 def get_random_featured_recipes(
@@ -49,60 +83,32 @@ def get_random_featured_recipes(
     Get a specified number of random recipes for the featured carousel.
     Returns a simplified payload with only id, title, and image URL.
     Filters out recipes without an image.
+    The picks come from FEATURED_POOL, so only the chosen rows are read.
     """
-    featured_recipes = db.query(
-        models.Recipe.recipe_id,
-        models.Recipe.title,
-        models.Recipe.image_url
-    ).filter(models.Recipe.image_url != None).order_by(func.random()).limit(count).all()
-
-    if not featured_recipes:
+    recipe_ids = FEATURED_POOL.sample(db, count)
+    if not recipe_ids:
         return []
 
+    featured_recipes = {
+        r.recipe_id: r for r in db.query(
+            models.Recipe.recipe_id,
+            models.Recipe.title,
+            models.Recipe.image_url
+        ).filter(models.Recipe.recipe_id.in_(recipe_ids))
+    }
     return [
-        {"recipe_id": r.recipe_id, "title": r.title, "image_url": r.image_url}
-        for r in featured_recipes
+        {"recipe_id": r.recipe_id, "title": r.title, "image_url": r.image_url, "image_variants": image_variants.variant_urls(r.image_url)}
+        for r in (featured_recipes.get(recipe_id) for recipe_id in recipe_ids) if r is not None
     ]
 
 
-def custom_scale(x, a=800, b=1500, x_min=500, x_max=3000):
-    return a + (x - x_min) * (b - a) / (x_max - x_min) if x > 1000 else x
-
-def load_bad_words(file_path: Path) -> set:
-    """Loads a set of bad words from a text file."""
-    if not file_path.is_file():
-        return set()
-    with open(file_path, "r", encoding="utf-8") as f:
-        words = {line.strip().lower() for line in f if line.strip()}
-    return words
-
-BAD_WORDS_FILE = Path(__file__).parent.parent / "Data" / "bad_words.txt"
-BAD_WORDS = load_bad_words(BAD_WORDS_FILE)
-
-def contains_bad_word(text: str) -> bool:
-    """Checks if a string contains any bad words."""
-    if not text:
-        return False
-    return any(bad_word in text.lower() for bad_word in BAD_WORDS)
-
-@router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.RecipeResponse)
-def create_recipe(
-    recipe: schemas.RecipeCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
-):
-    if contains_bad_word(recipe.title) or contains_bad_word(recipe.description):
-        raise HTTPException(status_code=422, detail="Title or description contains inappropriate language.")
+def validate_recipe(recipe: schemas.RecipeCreate):
+    """Rejects payloads with empty steps, no tags or ingredients, or inappropriate language."""
     for step in recipe.steps:
         if not step.strip():
             raise HTTPException(status_code=422, detail="Steps cannot be empty.")
-        if contains_bad_word(step):
-            raise HTTPException(status_code=422, detail="A step contains inappropriate language.")
     if not recipe.tags:
         raise HTTPException(status_code=422, detail="At least one tag is required.")
-    for tag_name in recipe.tags:
-        if contains_bad_word(tag_name):
-            raise HTTPException(status_code=422, detail="A tag contains inappropriate language.")
     if not recipe.ingredients:
         raise HTTPException(status_code=422, detail="At least one ingredient is required.")
     for ing in recipe.ingredients:
@@ -110,10 +116,48 @@ def create_recipe(
             float(ing.quantity)
         except ValueError:
             raise HTTPException(status_code=422, detail=f"Ingredient quantity '{ing.quantity}' must be a number.")
-        if contains_bad_word(ing.name):
-            raise HTTPException(status_code=422, detail="An ingredient name contains inappropriate language.")
-        if ing.unit and contains_bad_word(ing.unit):
-            raise HTTPException(status_code=422, detail="An ingredient unit contains inappropriate language.")
+
+    # Every text of the recipe in one pass over the bad-word automaton.
+    flagged = moderation.flagged_field(
+        [("Title or description contains inappropriate language.", recipe.title),
+         ("Title or description contains inappropriate language.", recipe.description)]
+        + [("A step contains inappropriate language.", step) for step in recipe.steps]
+        + [("A tag contains inappropriate language.", tag_name) for tag_name in recipe.tags]
+        + [field for ing in recipe.ingredients for field in (
+            ("An ingredient name contains inappropriate language.", ing.name),
+            ("An ingredient unit contains inappropriate language.", ing.unit),
+        )]
+    )
+    if flagged:
+        raise HTTPException(status_code=422, detail=flagged)
+
+def insert_recipe_children(db: Session, recipe_id: int, steps: List[str], tags: List[str]):
+    """Writes a recipe's steps and tag links with one multi-row INSERT each."""
+    if steps:
+        db.execute(insert(models.Step.__table__), [
+            {"recipe_id": recipe_id, "step_number": i + 1, "step_detail": step_detail}
+            for i, step_detail in enumerate(steps)
+        ])
+    tag_ids = recipe_names.tag_ids(db, tags)
+    # Spellings of one tag ("Gà", "gà") share a row and are linked once.
+    unique_tag_ids = list(dict.fromkeys(tag_ids[tag_name] for tag_name in tags))
+    if unique_tag_ids:
+        db.execute(insert(models.RecipeTag.__table__), [
+            {"recipe_id": recipe_id, "tag_id": tag_id} for tag_id in unique_tag_ids
+        ])
+
+def ingredient_lines(db: Session, ingredients: List[schemas.IngredientCreate]) -> dict:
+    """{ingredient_id: quantity} for a payload; a repeated ingredient keeps its last quantity."""
+    ingredient_ids = recipe_names.ingredient_ids(db, [ing.name for ing in ingredients])
+    return {ingredient_ids[ing.name]: f"{ing.quantity} {ing.unit}".strip() for ing in ingredients}
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.RecipeResponse)
+def create_recipe(
+    recipe: schemas.RecipeCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    validate_recipe(recipe)
 
     source_name = f"Uploaded by {current_user.username}"
     source = db.query(models.Source).filter(models.Source.source_name == source_name).first()
@@ -135,38 +179,22 @@ def create_recipe(
     db.add(new_recipe)
     db.flush()
 
-    for i, step_detail in enumerate(recipe.steps):
-        new_step = models.Step(recipe_id=new_recipe.recipe_id, step_number=i + 1, step_detail=step_detail)
-        db.add(new_step)
-    for tag_name in recipe.tags:
-        tag = db.query(models.Tag).filter(func.lower(models.Tag.tag_name) == func.lower(tag_name)).first()
-        if not tag:
-            tag = models.Tag(tag_name=tag_name)
-            db.add(tag)
-            db.flush()
-        recipe_tag = models.RecipeTag(recipe_id=new_recipe.recipe_id, tag_id=tag.tag_id)
-        db.add(recipe_tag)
-    for ing in recipe.ingredients:
-        ingredient_name_lower = ing.name.lower()
-        ingredient = db.query(models.Ingredient).filter(models.Ingredient.name == ingredient_name_lower).first()
-        if not ingredient:
-            ingredient = models.Ingredient(name=ingredient_name_lower)
-            db.add(ingredient)
-            db.flush()
-        quantity_str = f"{ing.quantity} {ing.unit}".strip()
-        recipe_ingredient = models.RecipeIngredient(
-            recipe_id=new_recipe.recipe_id,
-            ingredient_id=ingredient.ingredient_id,
-            quantity=quantity_str
-        )
-        db.add(recipe_ingredient)
+    insert_recipe_children(db, new_recipe.recipe_id, recipe.steps, recipe.tags)
+    lines = ingredient_lines(db, recipe.ingredients)
+    db.execute(insert(models.RecipeIngredient.__table__), [
+        {"recipe_id": new_recipe.recipe_id, "ingredient_id": ingredient_id, **nutrition_calculator.quantity_columns(quantity_str)}
+        for ingredient_id, quantity_str in lines.items()
+    ])
 
+    recipe_search.refresh_search_vectors(db, [new_recipe.recipe_id])
+    versioning.bump_recipes(db, [new_recipe.recipe_id], catalog=True)
     db.commit()
+    catalog.recipes_changed(db, [new_recipe.recipe_id])
     db.refresh(new_recipe)
 
-    return new_recipe
+    return image_variants.attach([new_recipe])[0]
 
-@router.put("/{recipe_id}", status_code=status.HTTP_200_OK, response_model=schemas.RecipeResponse)
+@router.put("/{recipe_id}", status_code=status.HTTP_200_OK, response_model=schemas.RecipeUpdateResponse)
 def update_recipe(
     recipe_id: int,
     recipe_update: schemas.RecipeUpdate,
@@ -180,46 +208,133 @@ def update_recipe(
 
     if db_recipe.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to edit this recipe")
-
-    db_recipe.title = recipe_update.title
-    db_recipe.description = recipe_update.description
-    db_recipe.num_of_people = f"Cho {recipe_update.servings} người"
-    db_recipe.image_url = recipe_update.image_url
-
-    db.query(models.Step).filter(models.Step.recipe_id == recipe_id).delete()
-    for i, step_detail in enumerate(recipe_update.steps):
-        new_step = models.Step(recipe_id=recipe_id, step_number=i + 1, step_detail=step_detail)
-        db.add(new_step)
-
-    db.query(models.RecipeTag).filter(models.RecipeTag.recipe_id == recipe_id).delete()
-    for tag_name in recipe_update.tags:
-        tag = db.query(models.Tag).filter(func.lower(models.Tag.tag_name) == func.lower(tag_name)).first()
-        if not tag:
-            tag = models.Tag(tag_name=tag_name)
-            db.add(tag)
-            db.flush()
-        recipe_tag = models.RecipeTag(recipe_id=recipe_id, tag_id=tag.tag_id)
-        db.add(recipe_tag)
-
-    db.query(models.RecipeIngredient).filter(models.RecipeIngredient.recipe_id == recipe_id).delete()
-    for ing in recipe_update.ingredients:
-        ingredient_name_lower = ing.name.lower()
-        ingredient = db.query(models.Ingredient).filter(models.Ingredient.name == ingredient_name_lower).first()
-        if not ingredient:
-            ingredient = models.Ingredient(name=ingredient_name_lower)
-            db.add(ingredient)
+    validate_recipe(recipe_update)
+
+    fields = {
+        "title": ("title", recipe_update.title),
+        "description": ("description", recipe_update.description),
+        "servings": ("num_of_people", f"Cho {recipe_update.servings} người"),
+        "image_url": ("image_url", recipe_update.image_url),
+    }
+    changes = schemas.RecipeChanges()
+    for field, (column, value) in fields.items():
+        if getattr(db_recipe, column) != value:
+            setattr(db_recipe, column, value)
+            changes.fields.append(field)
+    changes.steps = update_steps(db, recipe_id, recipe_update.steps)
+    changes.tags = update_tags(db, recipe_id, recipe_update.tags)
+    changes.ingredients = update_ingredients(db, recipe_id, recipe_update.ingredients)
+
+    if changes.changed:
+        ingredients_changed = changes.ingredients.changed
+        if ingredients_changed:
             db.flush()
-        quantity_str = f"{ing.quantity} {ing.unit}".strip()
-        recipe_ingredient = models.RecipeIngredient(
-            recipe_id=recipe_id,
-            ingredient_id=ingredient.ingredient_id,
-            quantity=quantity_str,
-        )
-        db.add(recipe_ingredient)
+            nutrition_calculator.refresh_recipe_nutrition(db_recipe, db)
+        if ingredients_changed or {"title", "description"} & set(changes.fields):
+            recipe_search.refresh_search_vectors(db, [recipe_id])
+        # Cards show the fields, tags and ingredients, but not the steps.
+        card_changed = changes.fields or changes.tags.changed or ingredients_changed
+        versioning.bump_recipes(db, [recipe_id], catalog=bool(card_changed))
+        db.commit()
+        catalog.recipes_changed(db, [recipe_id])
+        db.refresh(db_recipe)
+    image_variants.attach([db_recipe])
+    return schemas.RecipeUpdateResponse(
+        **schemas.RecipeResponse.model_validate(db_recipe).model_dump(), changes=changes
+    )
 
-    db.commit()
-    db.refresh(db_recipe)
-    return db_recipe
+def update_steps(db: Session, recipe_id: int, steps: List[str]) -> schemas.ChildChanges:
+    """Rewrites only the steps whose text changed; returns the step numbers touched."""
+    current = {
+        step.step_number: step
+        for step in db.query(models.Step).filter(models.Step.recipe_id == recipe_id)
+    }
+    new = {i + 1: step_detail for i, step_detail in enumerate(steps)}
+    changes = schemas.ChildChanges(
+        added=[number for number in new if number not in current],
+        updated=[number for number, step in current.items() if number in new and step.step_detail != new[number]],
+        removed=sorted(number for number in current if number not in new),
+    )
+    for number in changes.updated:
+        current[number].step_detail = new[number]
+    if changes.removed:
+        db.query(models.Step).filter(
+            models.Step.recipe_id == recipe_id,
+            models.Step.step_number.in_(changes.removed),
+        ).delete(synchronize_session=False)
+    if changes.added:
+        db.execute(insert(models.Step.__table__), [
+            {"recipe_id": recipe_id, "step_number": number, "step_detail": new[number]}
+            for number in changes.added
+        ])
+    return changes
+
+def update_tags(db: Session, recipe_id: int, tags: List[str]) -> schemas.ChildChanges:
+    """Links added tags and unlinks removed ones; returns their names."""
+    current = dict(
+        db.query(models.RecipeTag.tag_id, models.Tag.tag_name)
+        .join(models.Tag, models.Tag.tag_id == models.RecipeTag.tag_id)
+        .filter(models.RecipeTag.recipe_id == recipe_id)
+    )
+    # Unchanged tags are matched without writing; only unknown names insert.
+    tag_ids = recipe_names.tag_ids(db, tags)
+    new = {}
+    for tag_name in tags:
+        new.setdefault(tag_ids[tag_name], tag_name)
+    added = [tag_id for tag_id in new if tag_id not in current]
+    removed = [tag_id for tag_id in current if tag_id not in new]
+    if removed:
+        db.query(models.RecipeTag).filter(
+            models.RecipeTag.recipe_id == recipe_id,
+            models.RecipeTag.tag_id.in_(removed),
+        ).delete(synchronize_session=False)
+    if added:
+        db.execute(insert(models.RecipeTag.__table__), [
+            {"recipe_id": recipe_id, "tag_id": tag_id} for tag_id in added
+        ])
+    return schemas.ChildChanges(
+        added=[new[tag_id] for tag_id in added],
+        removed=[current[tag_id] for tag_id in removed],
+    )
+
+def update_ingredients(db: Session, recipe_id: int, ingredients: List[schemas.IngredientCreate]) -> schemas.ChildChanges:
+    """Writes only the ingredient lines whose ingredient or quantity changed; returns their names."""
+    current = {
+        recipe_ingredient.ingredient_id: (recipe_ingredient, name)
+        for recipe_ingredient, name in db.query(models.RecipeIngredient, models.Ingredient.name)
+        .join(models.Ingredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)
+        .filter(models.RecipeIngredient.recipe_id == recipe_id)
+    }
+    ingredient_ids = recipe_names.ingredient_ids(db, [ing.name for ing in ingredients])
+    new = {}
+    for ing in ingredients:
+        new[ingredient_ids[ing.name]] = (f"{ing.quantity} {ing.unit}".strip(), ing.name)
+    added = [ingredient_id for ingredient_id in new if ingredient_id not in current]
+    updated = [
+        ingredient_id for ingredient_id, (recipe_ingredient, _) in current.items()
+        if ingredient_id in new and recipe_ingredient.quantity != new[ingredient_id][0]
+    ]
+    removed = [ingredient_id for ingredient_id in current if ingredient_id not in new]
+
+    for ingredient_id in updated:
+        recipe_ingredient = current[ingredient_id][0]
+        for column, value in nutrition_calculator.quantity_columns(new[ingredient_id][0]).items():
+            setattr(recipe_ingredient, column, value)
+    if removed:
+        db.query(models.RecipeIngredient).filter(
+            models.RecipeIngredient.recipe_id == recipe_id,
+            models.RecipeIngredient.ingredient_id.in_(removed),
+        ).delete(synchronize_session=False)
+    if added:
+        db.execute(insert(models.RecipeIngredient.__table__), [
+            {"recipe_id": recipe_id, "ingredient_id": ingredient_id, **nutrition_calculator.quantity_columns(new[ingredient_id][0])}
+            for ingredient_id in added
+        ])
+    return schemas.ChildChanges(
+        added=[new[ingredient_id][1] for ingredient_id in added],
+        updated=[current[ingredient_id][1] for ingredient_id in updated],
+        removed=[current[ingredient_id][1] for ingredient_id in removed],
+    )
 
 @router.delete("/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_recipe(
@@ -236,28 +351,14 @@ def delete_recipe(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this recipe")
 
     db.delete(db_recipe)
+    versioning.bump_catalog(db)
     db.commit()
-
-def enrich_recipe_data(recipes: List[models.Recipe], db: Session):
-    recipe_ids = [r.recipe_id for r in recipes]
-    if not recipe_ids:
-        return []
-
-    ingredients_q = db.query(models.RecipeIngredient).filter(models.RecipeIngredient.recipe_id.in_(recipe_ids)).options(joinedload(models.RecipeIngredient.ingredient)).all()
-
-    recipe_ingredients_map = {}
-    for ri in ingredients_q:
-        if ri.recipe_id not in recipe_ingredients_map:
-            recipe_ingredients_map[ri.recipe_id] = []
-        recipe_ingredients_map[ri.recipe_id].append({"name": ri.ingredient.name, "quantity": ri.quantity})
-    
-    for r in recipes:
-        r.ingredients = recipe_ingredients_map.get(r.recipe_id, [])
-
-    return recipes
+    catalog.recipes_removed([recipe_id])
 
 @router.get("/search/")
 def search_recipes(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     query: Optional[str] = Query(None, alias="query"),
     tag_inc: List[str] = Query(None, alias="tag_inc"),
@@ -266,70 +367,99 @@ def search_recipes(
     ing_exc: List[str] = Query(None, alias="ing_exc"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    sort: Literal["newest", "relevance"] = "newest",
     page: int = 1,
-    limit: int = 12
+    limit: int = 12,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces `page`"),
+    count: Literal["exact", "estimate", "none"] = Query("exact", description="How total_count is computed; see recipe_counts")
 ):
-    final_query = db.query(models.Recipe).options(joinedload(models.Recipe.source))
+    not_modified = versioning.conditional(request, response, listing_etag(db, count))
+    if not_modified:
+        return not_modified
+
+    final_query = db.query(models.Recipe)
 
     if start_date:
         final_query = final_query.filter(models.Recipe.date >= start_date)
     if end_date:
         final_query = final_query.filter(models.Recipe.date <= end_date)
 
-    if tag_inc:
-        for i, tag_name in enumerate(tag_inc):
-            alias = f"tag_{i}"
-            tag_subquery = db.query(models.RecipeTag.recipe_id).join(models.Tag).filter(models.Tag.tag_name == tag_name).subquery(alias)
-            final_query = final_query.join(tag_subquery, models.Recipe.recipe_id == tag_subquery.c.recipe_id)
-
-    if ing_inc:
-        for i, ingredient_name in enumerate(ing_inc):
-            alias = f"ing_{i}"
-            ing_subquery = db.query(models.RecipeIngredient.recipe_id).join(models.Ingredient).filter(models.Ingredient.name == ingredient_name).subquery(alias)
-            final_query = final_query.join(ing_subquery, models.Recipe.recipe_id == ing_subquery.c.recipe_id)
-
-    if tag_exc:
-        final_query = final_query.filter(~exists().where((models.RecipeTag.recipe_id == models.Recipe.recipe_id) & (models.RecipeTag.tag_id == models.Tag.tag_id) & (models.Tag.tag_name.in_(tag_exc))))
-
-    if ing_exc:
-        final_query = final_query.filter(~exists().where((models.RecipeIngredient.recipe_id == models.Recipe.recipe_id) & (models.RecipeIngredient.ingredient_id == models.Ingredient.ingredient_id) & (models.Ingredient.name.in_(ing_exc))))
+    if tag_inc or tag_exc or ing_inc or ing_exc:
+        final_query = final_query.filter(RECIPE_FILTER_INDEX.id_filter(db, tag_inc, tag_exc, ing_inc, ing_exc))
 
+    rank = None
     if query:
-        final_query = final_query.filter(func.lower(models.Recipe.title).contains(func.lower(query)))
+        final_query, rank = recipe_search.apply_search(final_query, query)
 
-    total_count = final_query.count()
+    signature = recipe_counts.filter_signature(
+        query=recipe_search.build_tsquery(query) if query else None,
+        tag_inc=tag_inc, tag_exc=tag_exc, ing_inc=ing_inc, ing_exc=ing_exc,
+        start_date=start_date, end_date=end_date
+    )
+    total_count = recipe_counts.total_count(db, final_query, count, signature)
     skip = (page - 1) * limit
-    recipes = final_query.order_by(models.Recipe.date.desc().nullslast(), models.Recipe.recipe_id.desc()).offset(skip).limit(limit).all()
-
-    recipes_with_data = enrich_recipe_data(recipes, db)
-    for recipe in recipes_with_data:
-        recipe.tags = [rt.tag.tag_name for rt in recipe.tags_association]
-        if recipe.creator is None:
-            recipe.creator_username = "Deleted user"
-        else:
-            recipe.creator_username = recipe.creator.username
+    if sort == "relevance" and rank is not None:
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="Cursor pagination is only available with sort=newest.")
+        next_cursor = None
+        recipes = final_query.options(*CARD_OPTIONS).order_by(
+            rank.desc(), models.Recipe.date.desc().nullslast(), models.Recipe.recipe_id.desc()
+        ).offset(skip).limit(limit + 1).all()
+        has_more = len(recipes) > limit
+        recipes = recipes[:limit]
+    else:
+        recipes, next_cursor = paginate(
+            final_query.options(*CARD_OPTIONS), models.Recipe.date, models.Recipe.recipe_id, limit, cursor, skip
+        )
+        has_more = next_cursor is not None
 
+    return {"recipes": recipe_cards(recipes), "total_count": total_count, "has_more": has_more, "next_cursor": next_cursor}
 
-    return {"recipes": recipes_with_data, "total_count": total_count}
+def listing_etag(db: Session, count: str) -> str:
+    # Estimates follow ANALYZE rather than writes, so two bodies with the same
+    # catalog version are only equivalent, not byte-identical.
+    return versioning.catalog_etag(versioning.catalog_version(db), weak=count == "estimate")
 
 @router.get("/")
-def get_recipes(db: Session = Depends(get_db), skip: int = 0, limit: int = 12):
-    query = db.query(models.Recipe).options(joinedload(models.Recipe.source))
-    total_count = query.count()
-    recipes = query.order_by(models.Recipe.date.desc().nullslast(), models.Recipe.recipe_id.desc()).offset(skip).limit(limit).all()
-   
-    recipes_with_data = enrich_recipe_data(recipes, db)
-    for recipe in recipes_with_data:
-        recipe.tags = [rt.tag.tag_name for rt in recipe.tags_association]
-        if recipe.creator is None:
-            recipe.creator_username = "Deleted user"
-        else:
-            recipe.creator_username = recipe.creator.username
-
-    return {"recipes": recipes_with_data, "total_count": total_count}
+def get_recipes(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 12,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces `skip`"),
+    count: Literal["exact", "estimate", "none"] = Query("exact", description="How total_count is computed; see recipe_counts")
+):
+    not_modified = versioning.conditional(request, response, listing_etag(db, count))
+    if not_modified:
+        return not_modified
+
+    query = db.query(models.Recipe)
+    total_count = recipe_counts.total_count(db, query, count, recipe_counts.filter_signature())
+    recipes, next_cursor = paginate(
+        query.options(*CARD_OPTIONS), models.Recipe.date, models.Recipe.recipe_id, limit, cursor, skip
+    )
+
+    return {"recipes": recipe_cards(recipes), "total_count": total_count, "has_more": next_cursor is not None, "next_cursor": next_cursor}
+
+@router.get("/suggest", response_model=List[schemas.RecipeSuggestion])
+def suggest_recipes(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """Typeahead for the search box: a few titles close to what has been typed so far."""
+    return recipe_search.suggest_titles(db, q, limit)
 
 @router.get("/{recipe_id}")
-def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
+def get_recipe(recipe_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    version = versioning.recipe_version(db, recipe_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    not_modified = versioning.conditional(request, response, versioning.recipe_etag(recipe_id, version))
+    if not_modified:
+        return not_modified
+
     recipe = db.query(models.Recipe).options(
         joinedload(models.Recipe.source), 
         joinedload(models.Recipe.creator)
@@ -342,9 +472,47 @@ def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
         recipe.creator_username = "Deleted user"
     else:
         recipe.creator_username = recipe.creator.username
+    image_variants.attach([recipe])
         
     return recipe
 
+@router.get("/{recipe_id}/full")
+def get_recipe_full(
+    recipe_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: Optional[models.User] = Depends(auth.get_optional_user),
+):
+    """
+    Everything the recipe page shows in one response: the recipe, ingredients,
+    steps, tags, nutrition and a review summary, plus whether the caller has
+    saved it.
+    """
+    version = versioning.recipe_version(db, recipe_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
+    is_saved = current_user is not None and db.query(
+        db.query(models.UserSavedRecipe).filter(
+            models.UserSavedRecipe.user_id == current_user.id,
+            models.UserSavedRecipe.recipe_id == recipe_id
+        ).exists()
+    ).scalar()
+    cache_control = versioning.PRIVATE_CACHE_CONTROL if current_user else versioning.PUBLIC_CACHE_CONTROL
+    not_modified = versioning.conditional(
+        request, response, versioning.recipe_etag(recipe_id, version, int(is_saved)), cache_control, vary="Authorization"
+    )
+    if not_modified:
+        return not_modified
+
+    bundle = recipe_bundle.get_recipe_bundle(db, recipe_id)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    # Building the bundle can fill in nutrition and so bump the version.
+    response.headers["ETag"] = versioning.recipe_etag(recipe_id, bundle["recipe"]["version"], int(is_saved))
+    return {**bundle, "is_saved": is_saved}
+
 @router.get("/{recipe_id}/ingredients/")
 def get_recipe_ingredients(recipe_id: int, db: Session = Depends(get_db)):
     if not db.query(models.Recipe).filter(models.Recipe.recipe_id == recipe_id).first():
@@ -383,6 +551,7 @@ def save_recipe_for_user(
     new_save = models.UserSavedRecipe(user_id=current_user.id, recipe_id=recipe_id)
     db.add(new_save)
     db.commit()
+    recipe_counts.invalidate(recipe_counts.filter_signature(saved_by=current_user.id))
     return {"message": "Recipe saved successfully"}
 
 @router.delete("/{recipe_id}/save", status_code=status.HTTP_204_NO_CONTENT)
@@ -399,6 +568,7 @@ def unsave_recipe_for_user(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved recipe record not found")
     db.delete(saved_recipe_record)
     db.commit()
+    recipe_counts.invalidate(recipe_counts.filter_signature(saved_by=current_user.id))
     return None
 
 
@@ -414,140 +584,31 @@ def get_recipe_nutrition(recipe_id: int, db: Session = Depends(get_db)):
             "fat": recipe.fat,
             "carbs": recipe.carbs
         }
-    ingredients_with_quantity = db.query(models.Ingredient.name, models.RecipeIngredient.quantity)\
-        .join(models.RecipeIngredient, models.Ingredient.ingredient_id == models.RecipeIngredient.ingredient_id)\
-        .filter(models.RecipeIngredient.recipe_id == recipe_id).all()
-    if not ingredients_with_quantity:
+    total_nutrition = nutrition_calculator.calculate_nutrition_batch([recipe_id], db, scale_all=True).get(recipe_id)
+    if total_nutrition is None:
         raise HTTPException(status_code=404, detail="No ingredients found for this recipe to calculate nutrition.")
-    total_nutrition = {"calories": 0.0, "protein": 0.0, "fat": 0.0, "carbs": 0.0}
-    for name, quantity in ingredients_with_quantity:
-        ingredient_pair = [name, quantity]
-        calories, protein, fat, carbs = nutrition_calculator.calculate_nutrition(ingredient_pair)
-        total_nutrition["calories"] += calories
-        total_nutrition["protein"] += protein
-        total_nutrition["fat"] += fat
-        total_nutrition["carbs"] += carbs
-    for key in total_nutrition:
-        total_nutrition[key] = round(custom_scale(total_nutrition[key]), 2)
 
     recipe.calories = total_nutrition["calories"]
     recipe.protein = total_nutrition["protein"]
     recipe.fat = total_nutrition["fat"]
     recipe.carbs = total_nutrition["carbs"]
+    versioning.bump_recipes(db, [recipe_id])
     db.commit()
     return total_nutrition
 
-@router.post("/import_recipes/")
+@router.post("/import_recipes/", status_code=status.HTTP_202_ACCEPTED)
 def import_recipes(
     filename: str = Query("vaobep.json", description="Name of the JSON file (in the Data/ directory) to import"),
     delete_existing: bool = Query(False, description="Delete existing data before importing"),
     db: Session = Depends(get_db)
 ):
-    tables = ["reviews", "recipe_tags", "steps", "recipe_ingredients", "meal_plan_recipes", "ingredients", "tags", "recipes", "sources"]
-    serial_table = {"reviews": "id", "recipes": "recipe_id", "ingredients": "ingredient_id", "tags": "tag_id", "sources": "source_id"}
-
-    if delete_existing:
-        for table in tables:
-            result = db.execute(text(f"SELECT EXISTS (SELECT FROM pg_tables WHERE tablename = '{table}')")).scalar()
-            if result:
-                db.execute(text(f"DELETE FROM {table}"))
-                if table in serial_table:
-                    db.execute(text(f"ALTER SEQUENCE {table}_{serial_table[table]}_seq RESTART WITH 1"))
-        db.commit()
-
-    file_path = f"Data/{filename}"
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            recipes_data = json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
-
-    for recipe in recipes_data:
-        source_name = recipe.get("source", "Unknown")
-        source = db.query(models.Source).filter(models.Source.source_name == source_name).first()
-        if not source:
-            source = models.Source(source_name=source_name)
-            db.add(source)
-            db.commit()
-            db.refresh(source)
-
-        new_recipe = models.Recipe(
-            title=recipe["title"],
-            description=recipe.get("description"),
-            num_of_people=recipe.get("num_of_people"),
-            date=recipe.get("date"),
-            image_url=recipe["image"],
-            url=recipe["url"],
-            source_id=source.source_id
-        )
-        db.add(new_recipe)
-        db.commit()
-        db.refresh(new_recipe)
-
-        added_ingredients = set()
-        for ingredient_data in recipe["ingredients"]:
-            if not ingredient_data or len(ingredient_data) < 1:
-                continue
-            ingredient_name = ingredient_data[0]
-            if ingredient_name in added_ingredients:
-                continue
-
-            added_ingredients.add(ingredient_name)
-            quantity = ingredient_data[1] if len(ingredient_data) > 1 else None
-            ingredient = db.query(models.Ingredient).filter(models.Ingredient.name == ingredient_name).first()
-            if not ingredient:
-                ingredient = models.Ingredient(name=ingredient_name)
-                db.add(ingredient)
-                db.commit()
-                db.refresh(ingredient)
-
-            existing_recipe_ing = db.query(models.RecipeIngredient).filter(
-                models.RecipeIngredient.recipe_id == new_recipe.recipe_id,
-                models.RecipeIngredient.ingredient_id == ingredient.ingredient_id
-            ).first()
-            if not existing_recipe_ing:
-                recipe_ing = models.RecipeIngredient(
-                    recipe_id=new_recipe.recipe_id,
-                    ingredient_id=ingredient.ingredient_id,
-                    quantity=quantity
-                )
-                db.add(recipe_ing)
-            else:
-                print(f"Ingredient {ingredient_name} already exists in recipe {new_recipe.title}")
-
-        steps = recipe.get("step-detail", "").split("\n")
-        for i, step_detail in enumerate(steps, start=1):
-            if step_detail.strip():
-                step = models.Step(
-                    recipe_id=new_recipe.recipe_id,
-                    step_number=i,
-                    step_detail=step_detail.strip()
-                )
-                db.add(step)
-
-        existing_recipe_tags = set(
-            (rt.recipe_id, rt.tag_id)
-            for rt in db.query(models.RecipeTag).filter(models.RecipeTag.recipe_id == new_recipe.recipe_id).all()
-        )
-
-        tags = recipe.get("tags", []) or []
-        for tag_name in tags:
-            tag = db.query(models.Tag).filter(models.Tag.tag_name == tag_name).first()
-            if not tag:
-                tag = models.Tag(tag_name=tag_name)
-                db.add(tag)
-                db.commit()
-                db.refresh(tag)
-
-            pair = (new_recipe.recipe_id, tag.tag_id)
-            if pair not in existing_recipe_tags:
-                recipe_tag = models.RecipeTag(
-                    recipe_id=new_recipe.recipe_id,
-                    tag_id=tag.tag_id
-                )
-                db.add(recipe_tag)
-                existing_recipe_tags.add(pair)
-
-        db.commit()
+    """
+    Queues the import as a background job and returns its id at once; follow it
+    at /import-jobs/{job_id}. .jsonl/.ndjson files work too.
+    """
+    file_path = import_jobs.data_path(filename)
+    if Path(filename).name != filename or not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: Data/{filename}")
 
-    return {"message": "Recipes imported successfully"}
+    job = import_jobs.submit(db, "recipes", filename, delete_existing)
+    return {"message": "Recipe import queued", "job_id": job.id, "status": job.status}
@@ -1,29 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from pathlib import Path
 from datetime import datetime
 
 import models
 import schemas
 import auth
+import catalog
+import moderation
+import versioning
 from database import get_db
 
 router = APIRouter(
     tags=["reviews"]
 )
 
-def load_bad_words(file_path: Path) -> set:
-    """Loads a set of bad words from a text file."""
-    if not file_path.is_file():
-        return set()
-    with open(file_path, "r", encoding="utf-8") as f:
-        words = {line.strip().lower() for line in f if line.strip()}
-    return words
-
-BAD_WORDS_FILE = Path(__file__).parent.parent / "Data" / "bad_words.txt"
-BAD_WORDS = load_bad_words(BAD_WORDS_FILE)
-
 @router.post("/recipes/{recipe_id}/reviews", response_model=schemas.Review, status_code=status.HTTP_201_CREATED)
 def create_review(
     recipe_id: int,
@@ -41,7 +32,7 @@ def create_review(
     if not review.rating and not (review.text and review.text.strip()):
         raise HTTPException(status_code=422, detail="Empty review detected, please provide star rating or text review.")
     
-    if review.text and any(bad_word in review.text.lower() for bad_word in BAD_WORDS):
+    if moderation.contains_bad_word(review.text):
         raise HTTPException(status_code=422, detail="Review contains inappropriate language.")
 
     db_review = models.Review(
@@ -52,7 +43,9 @@ def create_review(
         created_at=datetime.utcnow()
     )
     db.add(db_review)
+    versioning.bump_recipes(db, [recipe_id])
     db.commit()
+    catalog.recipe_details_changed([recipe_id])
     db.refresh(db_review)
     return db_review
 
@@ -93,12 +86,14 @@ def update_review(
     if not review_update.rating and not (review_update.text and review_update.text.strip()):
         raise HTTPException(status_code=422, detail="Empty review detected, please provide star rating or text review.")
     
-    if review_update.text and any(bad_word in review_update.text.lower() for bad_word in BAD_WORDS):
+    if moderation.contains_bad_word(review_update.text):
         raise HTTPException(status_code=422, detail="Review contains inappropriate language.")
     
     db_review.rating = review_update.rating
     db_review.text = review_update.text
+    versioning.bump_recipes(db, [db_review.recipe_id])
     db.commit()
+    catalog.recipe_details_changed([db_review.recipe_id])
     db.refresh(db_review)
     return db_review
 
@@ -116,6 +111,9 @@ def delete_review(
     if db_review.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete this review")
     
+    recipe_id = db_review.recipe_id
     db.delete(db_review)
+    versioning.bump_recipes(db, [recipe_id])
     db.commit()
+    catalog.recipe_details_changed([recipe_id])
     return
\ No newline at end of file
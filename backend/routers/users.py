@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Literal, Optional
 from sqlalchemy.orm import Session
 import models
 import schemas
 from database import get_db
 import auth
 from datetime import datetime
+from pagination import paginate
+import recipe_counts
+from recipe_cards import CARD_OPTIONS, recipe_cards
 
 router = APIRouter(
     prefix="/users",
@@ -44,47 +48,50 @@ def get_created_recipes_for_user(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user),
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces `skip`"),
+    count: Literal["exact", "estimate", "none"] = Query("exact", description="How total_count is computed; see recipe_counts")
 ):
     """
     Retrieves the list of recipes created by the currently authenticated user,
-    with pagination.
+    newest first, with offset or cursor pagination.
     """
     base_query = db.query(models.Recipe).filter(models.Recipe.user_id == current_user.id)
 
-    total_count = base_query.count()
-
-    created_recipes = base_query.order_by(
-        models.Recipe.date.desc()
-    ).offset(skip).limit(limit).all()
+    total_count = recipe_counts.total_count(
+        db, base_query, count, recipe_counts.filter_signature(created_by=current_user.id)
+    )
 
-    for recipe in created_recipes:
-        recipe.tags = [rt.tag.tag_name for rt in recipe.tags_association]
+    created_recipes, next_cursor = paginate(
+        base_query.options(*CARD_OPTIONS), models.Recipe.date, models.Recipe.recipe_id, limit, cursor, skip
+    )
 
-    return {"recipes": created_recipes, "total_count": total_count}
+    return {"recipes": recipe_cards(created_recipes), "total_count": total_count, "has_more": next_cursor is not None, "next_cursor": next_cursor}
 
 @router.get("/me/saved-recipes")
 def get_saved_recipes_for_user(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user),
     skip: int = 0,
-    limit: int = 12
+    limit: int = 12,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces `skip`"),
+    count: Literal["exact", "estimate", "none"] = Query("exact", description="How total_count is computed; see recipe_counts")
 ):
     """
     Retrieves the list of recipes saved by the currently authenticated user,
-    with pagination.
+    most recently saved first, with offset or cursor pagination.
     """
     base_query = db.query(models.Recipe).join(
         models.UserSavedRecipe, models.UserSavedRecipe.recipe_id == models.Recipe.recipe_id
     ).filter(models.UserSavedRecipe.user_id == current_user.id)
 
-    total_count = base_query.count()
-
-    saved_recipes = base_query.order_by(
-        models.UserSavedRecipe.saved_at.desc()
-    ).offset(skip).limit(limit).all()
+    # Saves are not recipe writes; save/unsave drop this count themselves.
+    total_count = recipe_counts.total_count(
+        db, base_query, count, recipe_counts.filter_signature(saved_by=current_user.id)
+    )
 
-    for recipe in saved_recipes:
-        recipe.tags = [rt.tag.tag_name for rt in recipe.tags_association]
+    saved_recipes, next_cursor = paginate(
+        base_query.options(*CARD_OPTIONS), models.UserSavedRecipe.saved_at, models.UserSavedRecipe.recipe_id, limit, cursor, skip
+    )
 
-    return {"recipes": saved_recipes, "total_count": total_count}
\ No newline at end of file
+    return {"recipes": recipe_cards(saved_recipes), "total_count": total_count, "has_more": next_cursor is not None, "next_cursor": next_cursor}
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator, Field
 import re
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 from typing import Literal
 
@@ -59,6 +59,27 @@ class Ingredient(BaseModel):
 class IngredientWithCount(Ingredient):
     recipe_count: int
 
+class FoodNutrition(BaseModel):
+    food_id: int
+    name: str
+    calories: float
+    protein: float
+    fat: float
+    carbs: float
+
+    class Config:
+        from_attributes = True
+
+class IngredientFoodMatch(Ingredient):
+    food_id: Optional[int] = None
+    food_name: Optional[str] = None
+    match_score: Optional[float] = None
+    match_is_manual: bool
+    recipe_count: int
+
+class IngredientFoodOverride(BaseModel):
+    food_id: Optional[int] = Field(None, description="food_nutrition row to use, or null for no nutrition")
+
 class Review(BaseModel):
     id: int
     recipe_id: int
@@ -104,6 +125,39 @@ class RecipeResponse(BaseModel):
     date: Optional[datetime] = None
     creator_username: Optional[str] = None
     tags: Optional[List[str]] = []
+    # Set by the routes from image_variants; None until the variants exist.
+    image_variants: Optional[dict] = None
+
+    class Config:
+        from_attributes = True
+
+class ChildChanges(BaseModel):
+    """Rows of one kind of recipe child an update touched: step numbers, or tag/ingredient names."""
+    added: List[Union[int, str]] = []
+    updated: List[Union[int, str]] = []
+    removed: List[Union[int, str]] = []
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+class RecipeChanges(BaseModel):
+    fields: List[str] = []
+    steps: ChildChanges = ChildChanges()
+    tags: ChildChanges = ChildChanges()
+    ingredients: ChildChanges = ChildChanges()
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.fields) or self.steps.changed or self.tags.changed or self.ingredients.changed
+
+class RecipeUpdateResponse(RecipeResponse):
+    changes: RecipeChanges
+
+class RecipeSuggestion(BaseModel):
+    recipe_id: int
+    title: str
+    image_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,75 @@
+"""
+Shared fixtures. Tests of pure helpers need nothing; those marked with the
+`client` or `db` fixtures talk to the database in database.DATABASE_URL and
+are skipped when it cannot be reached. They add their own rows under unique
+names and delete them again.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from database import SessionLocal, engine
+
+
+@pytest.fixture(scope="session")
+def database():
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("database is not reachable")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+
+    # main creates the tables and runs the migrations on import.
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db(database):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def unique_name():
+    return f"test-{uuid.uuid4().hex[:10]}"
+
+
+class QueryCounter:
+    """Counts the statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries(database):
+    return lambda: QueryCounter(database)
@@ -0,0 +1,60 @@
+import unicodedata
+
+import pytest
+
+from moderation import BadWordFilter
+
+
+def test_matches_anywhere_ignoring_case():
+    bad_words = BadWordFilter(["trash"])
+    assert bad_words.contains("What TRASHy food")
+    assert not bad_words.contains("A fine dish")
+    assert not bad_words.contains(None)
+
+
+def test_empty_list_matches_nothing():
+    assert not BadWordFilter([]).contains("anything")
+    assert not BadWordFilter(["", "  "]).contains("anything")
+
+
+def test_overlapping_terms_are_found_through_failure_links():
+    # "she" is only reached by falling back from the "hers" branch.
+    bad_words = BadWordFilter(["hers", "she"], fold_diacritics=False)
+    assert bad_words.contains("ushe")
+    assert bad_words.contains("xhers")
+    assert not bad_words.contains("her")
+
+
+def test_unmarked_terms_also_match_text_with_diacritics():
+    bad_words = BadWordFilter(["trash"])
+    assert bad_words.contains("Trásh")
+    assert not BadWordFilter(["trash"], fold_diacritics=False).contains("Trásh")
+
+
+def test_marked_terms_only_match_their_own_spelling():
+    bad_words = BadWordFilter(["đĩ"])
+    assert bad_words.contains("con đĩ")
+    assert not bad_words.contains("đi chợ")
+
+
+def test_decomposed_text_is_normalized():
+    assert BadWordFilter(["hành"]).contains("hành phi")
+    assert BadWordFilter(["hành"], fold_diacritics=False).contains("hành phi")
+
+
+@pytest.mark.parametrize("text, flagged", [
+    ("ass", True),
+    ("kick ass!", True),
+    ("class", False),
+    ("assume", False),
+    ("glass ass", True),
+])
+def test_whole_words(text, flagged):
+    assert BadWordFilter(["ass"], whole_words=True).contains(text) is flagged
+
+
+def test_flagged_field_reports_the_first_match():
+    bad_words = BadWordFilter(["trash"])
+    fields = [("title", "Canh chua"), ("step", None), ("tag", "trash talk"), ("ingredient", "trash")]
+    assert bad_words.flagged_field(fields) == "tag"
+    assert bad_words.flagged_field(fields[:2]) is None
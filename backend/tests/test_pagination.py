@@ -0,0 +1,39 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("sort_value, row_id", [
+    (datetime(2024, 5, 17, 8, 30, 15, 123456), 42),
+    (None, 7),
+])
+def test_cursor_round_trip(sort_value, row_id):
+    assert decode_cursor(encode_cursor(sort_value, row_id)) == (sort_value, row_id)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(datetime(2024, 1, 1), 10**12)
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def encoded(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    encoded(b"\xff\xfe"),
+    encoded(b"[]"),
+    encoded(b'{"k": null}'),
+    encoded(b'{"k": "yesterday", "id": 1}'),
+    encoded(b'{"k": null, "id": "x"}'),
+])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
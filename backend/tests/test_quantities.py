@@ -0,0 +1,30 @@
+import pytest
+
+from nutrition_calculator import parse_quantity_unit
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("200 g", (200.0, "g")),
+    ("1,5 kg", (1.5, "kg")),
+    ("1/2 trái", (0.5, "trái")),
+    ("1 1/2 chén", (1.5, "chén")),
+    ("½ chén", (0.5, "chén")),
+    ("2-3 quả", (2.5, "quả")),
+    ("2 Muỗng canh", (2.0, "muỗng canh")),
+    ("  3  củ ", (3.0, "củ")),
+])
+def test_amount_and_unit(text, expected):
+    assert parse_quantity_unit(text) == expected
+
+
+def test_bare_number_is_grams():
+    assert parse_quantity_unit("300") == (300.0, "g")
+
+
+@pytest.mark.parametrize("text", [None, "", "ít muối", 5])
+def test_no_leading_number_is_zero_grams(text):
+    assert parse_quantity_unit(text) == (0, "g")
+
+
+def test_zero_denominator_is_zero():
+    assert parse_quantity_unit("1/0 thìa") == (0, "thìa")
@@ -0,0 +1,106 @@
+"""
+The list endpoints load a page of cards with a fixed number of queries
+(recipe_cards.CARD_OPTIONS), however many recipes the page holds.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import auth
+import catalog
+import models
+
+PAGE_SIZES = (4, 12)
+RECIPE_COUNT = 15
+# The page with its source and creator joined in, then one query each for
+# tags and ingredients; plus the catalog version behind the ETag of the
+# public listings, or the current user on /users/me/*.
+EXPECTED_QUERIES = {
+    "/recipes/": 4,
+    "/recipes/search/": 4,
+    "/users/me/created-recipes": 4,
+    "/users/me/saved-recipes": 4,
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    """A user with RECIPE_COUNT recipes, all saved, each with two tags, three ingredients and a source."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    prefix = f"cards-{datetime.now(timezone.utc).strftime('%H%M%S%f')}"
+    user = models.User(username=prefix, hashed_password=auth.get_password_hash("Passw0rd!"))
+    source = models.Source(source_name=f"{prefix} source")
+    tags = [models.Tag(tag_name=f"{prefix} tag {i}") for i in range(2)]
+    ingredients = [models.Ingredient(name=f"{prefix} ingredient {i}") for i in range(3)]
+    db.add_all([user, source, *tags, *ingredients])
+    db.flush()
+
+    # Dated in the future so they make up the first pages of /recipes/ too.
+    newest = datetime(2100, 1, 1)
+    recipes = [
+        models.Recipe(
+            title=f"{prefix} recipe {i}", description="Test recipe", date=newest - timedelta(minutes=i),
+            source_id=source.source_id, user_id=user.id,
+        )
+        for i in range(RECIPE_COUNT)
+    ]
+    db.add_all(recipes)
+    db.flush()
+    for recipe in recipes:
+        db.add_all([models.RecipeTag(recipe_id=recipe.recipe_id, tag_id=tag.tag_id) for tag in tags])
+        db.add_all([
+            models.RecipeIngredient(recipe_id=recipe.recipe_id, ingredient_id=ingredient.ingredient_id, quantity="100 g")
+            for ingredient in ingredients
+        ])
+        db.add(models.UserSavedRecipe(user_id=user.id, recipe_id=recipe.recipe_id, saved_at=recipe.date))
+    db.commit()
+    catalog.catalog_reset()
+
+    recipe_ids = [recipe.recipe_id for recipe in recipes]
+    yield {"user": user.username, "tag": tags[0].tag_name, "recipe_ids": recipe_ids}
+
+    db.query(models.UserSavedRecipe).filter(models.UserSavedRecipe.user_id == user.id).delete()
+    db.query(models.RecipeTag).filter(models.RecipeTag.recipe_id.in_(recipe_ids)).delete()
+    db.query(models.RecipeIngredient).filter(models.RecipeIngredient.recipe_id.in_(recipe_ids)).delete()
+    db.query(models.Recipe).filter(models.Recipe.recipe_id.in_(recipe_ids)).delete()
+    db.query(models.Tag).filter(models.Tag.tag_id.in_([tag.tag_id for tag in tags])).delete()
+    db.query(models.Ingredient).filter(
+        models.Ingredient.ingredient_id.in_([ingredient.ingredient_id for ingredient in ingredients])
+    ).delete()
+    db.query(models.Source).filter(models.Source.source_id == source.source_id).delete()
+    db.query(models.User).filter(models.User.id == user.id).delete()
+    db.commit()
+    db.close()
+    catalog.catalog_reset()
+
+
+@pytest.fixture(scope="module")
+def headers(client, seeded):
+    response = client.post("/token", data={"username": seeded["user"], "password": "Passw0rd!"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.parametrize("path", EXPECTED_QUERIES)
+def test_card_pages_use_a_constant_number_of_queries(client, seeded, headers, count_queries, path):
+    params = {"tag_inc": seeded["tag"]} if path == "/recipes/search/" else {}
+    request_headers = headers if path.startswith("/users/") else {}
+    # Builds the filter index and caches the count, which later pages reuse.
+    assert client.get(path, params={**params, "limit": 1}, headers=request_headers).status_code == 200
+
+    counts = {}
+    for limit in PAGE_SIZES:
+        with count_queries() as counter:
+            response = client.get(path, params={**params, "limit": limit}, headers=request_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert [card["recipe_id"] for card in body["recipes"]] == seeded["recipe_ids"][:limit]
+        assert body["has_more"] is True
+        card = body["recipes"][0]
+        assert card["creator_username"] == seeded["user"]
+        assert card["source"]["source_name"].endswith("source")
+        assert len(card["tags"]) == 2 and len(card["ingredients"]) == 3
+        counts[limit] = counter.count
+
+    assert counts == {limit: EXPECTED_QUERIES[path] for limit in PAGE_SIZES}, counter.statements
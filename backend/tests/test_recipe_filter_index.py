@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sqlalchemy.sql import operators
+
+from recipe_filter_index import RecipeFilterIndex, _group_ids
+
+RECIPE_IDS = list(range(1, 11))
+TAGS = [(1, "canh"), (2, "canh"), (3, "canh"), (3, "chay"), (4, "chay"), (5, "xào")]
+INGREDIENTS = [(1, "cá"), (2, "cá"), (2, "cà chua"), (3, "cà chua"), (9, "tôm")]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    def rows(db, recipe_ids=None):
+        return np.asarray(RECIPE_IDS), {"tag": _group_ids(TAGS), "ingredient": _group_ids(INGREDIENTS)}
+
+    monkeypatch.setattr(RecipeFilterIndex, "_rows", staticmethod(rows))
+    return RecipeFilterIndex()
+
+
+def clause_ids(clause):
+    """("in" or "not in", ids) of an id_filter clause."""
+    operator = {operators.in_op: "in", operators.not_in_op: "not in"}[clause.operator]
+    return operator, sorted(clause.right.value)
+
+
+def test_includes_intersect(index):
+    assert clause_ids(index.id_filter(None, tag_inc=["canh"], ing_inc=["cà chua"])) == ("in", [2, 3])
+
+
+def test_excludes_remove_their_union(index):
+    ids, _ = index.matching_ids(None, tag_inc=["canh"], tag_exc=["chay"], ing_exc=["cá"])
+    assert ids.tolist() == []
+    ids, _ = index.matching_ids(None, tag_inc=["canh"], tag_exc=["chay"])
+    assert ids.tolist() == [1, 2]
+
+
+def test_unknown_include_matches_nothing(index):
+    assert clause_ids(index.id_filter(None, tag_inc=["canh", "unknown"])) == ("in", [])
+
+
+def test_exclude_only_is_written_as_not_in_the_complement(index):
+    # Eight of ten recipes match, so the two that do not are listed instead.
+    assert clause_ids(index.id_filter(None, tag_exc=["chay"])) == ("not in", [3, 4])
+
+
+def test_unknown_exclude_excludes_nothing(index):
+    assert clause_ids(index.id_filter(None, ing_exc=["unknown"])) == ("not in", [])
+
+
+def test_removed_recipes_stop_matching(index):
+    index.matching_ids(None)
+    index.remove_recipes([2])
+    assert clause_ids(index.id_filter(None, ing_inc=["cá"])) == ("in", [1])
@@ -0,0 +1,31 @@
+import pytest
+
+from versioning import catalog_etag, etag_matches, recipe_etag
+
+
+def test_etag_formats():
+    assert catalog_etag(12) == '"catalog-12"'
+    assert catalog_etag(12, weak=True) == 'W/"catalog-12"'
+    assert recipe_etag(5, 40) == '"recipe-5-40"'
+    assert recipe_etag(5, 40, 1) == '"recipe-5-40-1"'
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    ('"catalog-12"', True),
+    ('"catalog-11"', False),
+    ("*", True),
+    (" * ", True),
+    ('"catalog-11", "catalog-12"', True),
+    ('"catalog-11" ,"catalog-13"', False),
+    ('W/"catalog-12"', True),
+    ("catalog-12", False),
+])
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, '"catalog-12"') is matches
+
+
+def test_weak_comparison_ignores_prefix_on_both_sides():
+    assert etag_matches('"catalog-12"', catalog_etag(12, weak=True))
+    assert etag_matches('W/"catalog-12"', catalog_etag(12, weak=True))
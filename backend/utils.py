@@ -1,4 +1,6 @@
 import re
+import unicodedata
+
 def preprocess_vietnamese(text: str) -> str:
     text = text.lower()
     text = re.sub(r'[^\w\s]', '', text)
@@ -11,6 +13,12 @@ def preprocess_vietnamese(text: str) -> str:
     filtered = [t for t in tokens if t not in stopwords]
     return ' '.join(filtered)
 
+def fold_vietnamese(text: str) -> str:
+    """Lowercases and strips diacritics, so "Gà rán" and "ga ran" compare equal."""
+    text = unicodedata.normalize("NFD", text.lower()).replace("đ", "d")
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return unicodedata.normalize("NFC", text)
+
 quantity_to_gram = {
     "bát": 150,           # bát cơm/nước ~ 250g
     "chén": 100,          # chén nhỏ hơn bát
@@ -69,4 +77,17 @@ quantity_to_gram = {
     "thìa cafe": 5,
     "tô": 350,             # tô canh, tô mì
     "ống": 50           # ống hút, ống trúc
+}
+
+# Other spellings of the units above, resolved to the key whose gram weight applies.
+UNIT_ALIASES = {
+    "muỗng cafe": "muỗng cà phê",
+    "muỗng café": "muỗng cà phê",
+    "thìa café": "thìa cà phê",
+    "muỗng súp": "muỗng canh",
+    "thìa súp": "thìa canh",
+    "lit": "lít",
+    "grams": "gram",
+    "kilogram": "kg",
+    "mililit": "ml",
 }
\ No newline at end of file
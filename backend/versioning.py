@@ -0,0 +1,113 @@
+"""
+Version counters behind the ETags of the catalog read endpoints.
+
+Every recipe has a version, and the catalog as a whole has one in the
+catalog_versions table. Write paths call bump_recipes() or bump_catalog()
+inside their own transaction, right before the commit, so a version never
+becomes visible without the data it stands for and the single catalog row is
+locked only briefly. Recipe versions come from recipe_versions_seq, which
+keeps them unique for the life of the database even after an import restarts
+the recipe id sequence, and takes no lock.
+
+The catalog version backs the listing, tag and ingredient ETags, so only
+writes that change what those show (creating, deleting and importing
+recipes, editing card fields, admin changes) pass catalog=True. Reviews,
+steps and nutrition filled in lazily by a GET only move the recipe's own
+version.
+
+Read endpoints turn the versions into strong ETags. conditional() answers a
+matching If-None-Match with 304 after one primary-key lookup, before the
+endpoint runs its real queries. Cache-Control lets browsers revalidate on
+every use, and lets a shared cache (nginx.conf) serve public responses for a
+few seconds and then revalidate them with the same ETags.
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models
+
+CATALOG = "catalog"
+
+PUBLIC_CACHE_CONTROL = "public, max-age=0, s-maxage=5, must-revalidate"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def bump_catalog(db: Session) -> int:
+    """Advances the catalog version and returns the new value."""
+    return db.execute(
+        text(
+            "INSERT INTO catalog_versions (name, version) VALUES (:name, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = catalog_versions.version + 1 "
+            "RETURNING version"
+        ),
+        {"name": CATALOG},
+    ).scalar()
+
+
+def bump_recipes(db: Session, recipe_ids, catalog: bool = False) -> Optional[int]:
+    """
+    Moves the given recipes to a new version and returns it. With catalog=True
+    the catalog version advances too, for writes that listings show.
+    """
+    if catalog:
+        bump_catalog(db)
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return None
+    version = db.execute(text("SELECT nextval('recipe_versions_seq')")).scalar()
+    db.query(models.Recipe).filter(models.Recipe.recipe_id.in_(recipe_ids)).update(
+        {models.Recipe.version: version}, synchronize_session="evaluate"
+    )
+    return version
+
+
+def catalog_version(db: Session) -> int:
+    version = db.query(models.CatalogVersion.version).filter(models.CatalogVersion.name == CATALOG).scalar()
+    return version or 0
+
+
+def recipe_version(db: Session, recipe_id: int) -> Optional[int]:
+    """The recipe's version, or None if it does not exist."""
+    return db.query(models.Recipe.version).filter(models.Recipe.recipe_id == recipe_id).scalar()
+
+
+def catalog_etag(version: int, weak: bool = False) -> str:
+    etag = f'"catalog-{version}"'
+    return f"W/{etag}" if weak else etag
+
+
+def recipe_etag(recipe_id: int, version: int, *extra) -> str:
+    return '"' + "-".join(str(part) for part in ("recipe", recipe_id, version, *extra)) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored on both sides."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = PUBLIC_CACHE_CONTROL,
+    vary: Optional[str] = None,
+) -> Optional[Response]:
+    """
+    Puts the caching headers on `response`, and returns a bodiless 304 to send
+    instead when the client already holds this version.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
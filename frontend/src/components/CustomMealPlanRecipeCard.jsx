@@ -3,6 +3,7 @@ import React, { useContext } from 'react';
 import { Link } from 'react-router-dom';
 import { FaFire, FaTrash } from 'react-icons/fa';
 import defaultImage from '../assets/default.png';
+import RecipeImage from './RecipeImage';
 import { AuthContext } from '../context/AuthContext';
 
 const CustomMealPlanRecipeCard = ({ recipe, onRecipeRemoved }) => {
@@ -42,10 +43,12 @@ const CustomMealPlanRecipeCard = ({ recipe, onRecipeRemoved }) => {
                 <FaTrash />
             </button>
             <Link to={`/recipe/${recipe.recipe_id}`} className="block">
-                <img
-                    src={recipe.image_url || defaultImage}
+                <RecipeImage
+                    recipe={recipe}
                     alt={recipe.title}
                     className="w-full h-48 object-cover"
+                    sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+                    fallback={defaultImage}
                 />
             </Link>
             <div className="p-4 flex-grow">
@@ -3,6 +3,7 @@ import React from 'react';
 import { Link } from 'react-router-dom';
 import { FaFire, FaDotCircle } from 'react-icons/fa';
 import defaultImage from '../assets/default.png';
+import RecipeImage from './RecipeImage';
 
 const NutritionStat = ({ icon, value, unit, label, colorClass }) => (
     <div className={`flex items-center gap-2 ${colorClass}`}>
@@ -19,10 +20,12 @@ const MealPlanRecipeCard = ({ recipe }) => {
     return (
         <div className="bg-white rounded-lg shadow-lg overflow-hidden transform hover:scale-105 transition-transform duration-300 flex flex-col">
             <Link to={`/recipe/${recipe.recipe_id}`} className="block">
-                <img
-                    src={recipe.image_url || defaultImage}
+                <RecipeImage
+                    recipe={recipe}
                     alt={recipe.title}
                     className="w-full h-48 object-cover"
+                    sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+                    fallback={defaultImage}
                 />
             </Link>
             <div className="p-4 flex-grow flex flex-col">
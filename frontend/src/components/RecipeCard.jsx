@@ -4,6 +4,7 @@ import { Link, useNavigate } from 'react-router-dom';
 import { FaTag, FaCalendarAlt, FaHeart, FaRegHeart, FaEdit, FaTrash, FaClipboardList } from 'react-icons/fa';
 import { AuthContext } from '../context/AuthContext';
 import defaultImage from '../assets/default.png';
+import RecipeImage from './RecipeImage';
 
 const RecipeCard = ({ recipe, isOwner = false, onRecipeDeleted }) => {
   const navigate = useNavigate();
@@ -135,11 +136,12 @@ const RecipeCard = ({ recipe, isOwner = false, onRecipeDeleted }) => {
 
       <Link to={`/recipe/${recipe.recipe_id}`} className="flex flex-col flex-grow">
         <div className="h-48 overflow-hidden relative">
-          <img
-            src={recipe.image_url || defaultImage}
+          <RecipeImage
+            recipe={recipe}
             alt={recipe.title}
             className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-105"
-            onError={(e) => { e.target.onerror = null; e.target.src = defaultImage; }}
+            sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+            fallback={defaultImage}
           />
         </div>
         <div className="p-4 flex flex-col flex-grow">
@@ -0,0 +1,46 @@
+// src/components/RecipeImage.jsx
+import React, { useState } from 'react';
+
+// Resized WebP/JPEG variants ({ thumb, card, hero }, see backend/image_variants.py)
+// let the browser pick the smallest file that fills the slot. Images without
+// variants, such as those of imported recipes, are shown as they are.
+const srcSet = (variants, format) => {
+  const byWidth = {};
+  Object.values(variants).forEach((variant) => { byWidth[variant.width] = variant[format]; });
+  return Object.entries(byWidth).map(([width, url]) => `${url} ${width}w`).join(', ');
+};
+
+const RecipeImage = ({ recipe, alt, className, sizes, fallback }) => {
+  const [failed, setFailed] = useState(false);
+  const variants = recipe.image_variants;
+
+  if (failed || !variants) {
+    return (
+      <img
+        src={(failed ? fallback : recipe.image_url || fallback)}
+        alt={alt}
+        className={className}
+        onError={fallback && !failed ? () => setFailed(true) : undefined}
+      />
+    );
+  }
+
+  const largest = Object.values(variants).reduce((a, b) => (b.width > a.width ? b : a));
+  return (
+    <picture className="contents">
+      <source type="image/webp" srcSet={srcSet(variants, 'webp')} sizes={sizes} />
+      <img
+        src={largest.jpeg}
+        srcSet={srcSet(variants, 'jpeg')}
+        sizes={sizes}
+        width={largest.width}
+        height={largest.height}
+        alt={alt}
+        className={className}
+        onError={fallback ? () => setFailed(true) : undefined}
+      />
+    </picture>
+  );
+};
+
+export default RecipeImage;
@@ -1,6 +1,7 @@
 // src/page/Home.jsx
 import React, { useState, useEffect } from 'react';
 import RecipeCard from '../components/RecipeCard';
+import RecipeImage from '../components/RecipeImage';
 import { Carousel } from 'react-responsive-carousel';
 import 'react-responsive-carousel/lib/styles/carousel.min.css';
 import { Link } from 'react-router-dom';
@@ -29,11 +30,12 @@ const RecipeCarousel = ({ recipes }) => {
         {recipes.map((recipe) => (
           <Link to={`/recipe/${recipe.recipe_id}`} key={recipe.recipe_id} className="block">
             <div className="relative h-64 md:h-96">
-              <img
-                src={recipe.image_url}
+              <RecipeImage
+                recipe={recipe}
                 alt={recipe.title}
                 className="w-full h-full object-cover transform group-hover:scale-105 transition-transform duration-500 ease-in-out"
-                onError={(e) => { e.target.onerror = null; e.target.src="https://placehold.co/800x400/f97316/ffffff?text=Image+Not+Available"; }}
+                sizes="100vw"
+                fallback="https://placehold.co/800x400/f97316/ffffff?text=Image+Not+Available"
               />
               <div className="absolute inset-0 bg-gradient-to-t from-black/70 via-black/30 to-transparent" />
               <div className="absolute bottom-0 left-0 right-0 p-6 md:p-8">
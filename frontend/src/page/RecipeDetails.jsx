@@ -3,6 +3,7 @@ import { useParams, useNavigate, Link } from 'react-router-dom';
 import { FaArrowLeft, FaCalendarAlt, FaExternalLinkAlt, FaUsers, FaStar, FaEdit, FaTrash, FaHeart, FaRegHeart, FaClipboardList } from 'react-icons/fa';
 import { AuthContext } from '../context/AuthContext';
 import defaultImage from '../assets/default.png';
+import RecipeImage from '../components/RecipeImage';
 
 const RatingSummary = ({ stats }) => {
     if (stats.total === 0) {
@@ -75,27 +76,20 @@ const RecipeDetails = () => {
       setLoading(true);
       setError(null);
       try {
-        const [recipeRes, ingredientsRes, stepsRes, tagsRes, reviewsRes, nutritionRes] = await Promise.all([
-          fetch(`http://localhost:8000/recipes/${id}`),
-          fetch(`http://localhost:8000/recipes/${id}/ingredients/`),
-          fetch(`http://localhost:8000/recipes/${id}/steps/`),
-          fetch(`http://localhost:8000/recipes/${id}/tags/`),
+        const [bundleRes, reviewsRes] = await Promise.all([
+          fetch(`http://localhost:8000/recipes/${id}/full`),
           fetch(`http://localhost:8000/recipes/${id}/reviews/`),
-          fetch(`http://localhost:8000/recipes/${id}/nutrition`),
         ]);
 
-        if (!recipeRes.ok) throw new Error(`Recipe not found`);
-        
-        const recipeData = await recipeRes.json();
-        setRecipe(recipeData);
-        setIngredients(await ingredientsRes.json());
-        setSteps(await stepsRes.json());
-        setTags(await tagsRes.json());
-        setReviews(await reviewsRes.json());
+        if (!bundleRes.ok) throw new Error(`Recipe not found`);
 
-        if (nutritionRes.ok) {
-            setNutrition(await nutritionRes.json());
-        }
+        const bundle = await bundleRes.json();
+        setRecipe(bundle.recipe);
+        setIngredients(bundle.ingredients);
+        setSteps(bundle.steps);
+        setTags(bundle.tags);
+        setNutrition(bundle.nutrition);
+        setReviews(await reviewsRes.json());
 
       } catch (err) {
         setError(err.message);
@@ -197,7 +191,7 @@ const RecipeDetails = () => {
       </button>
 
       <div className="bg-white shadow-xl rounded-lg overflow-hidden">
-        <img src={recipe.image_url || defaultImage} alt={recipe.title} className="w-full h-96 object-cover"/>
+        <RecipeImage recipe={recipe} alt={recipe.title} className="w-full h-96 object-cover" sizes="(min-width: 896px) 864px, 100vw" fallback={defaultImage}/>
         <div className="p-6">
           <div className="flex justify-between items-start mb-4">
             <h1 className="text-4xl font-bold text-orange-700 pr-4">{recipe.title}</h1>